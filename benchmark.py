@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_PATH = os.path.join(SCRIPT_DIR, 'benchmark_results.jsonl')
+SPLIT_RESULTS_PATH = os.path.join(SCRIPT_DIR, 'benchmark_threads.jsonl')
+
+PARTICIPANT = 'SALTACII_9000'
+VISITS = ['V1', 'V2', 'V3', 'V4']
+
+# Stages in pipeline order; each one is measured in its own process on the outputs of the previous ones
+STAGES = ['crop', 'extract_crop', 'treece_crop', 'cortical_profiles', 'registration', 'common_region', 'crm', 'common_region_crop', 'compartments', 'voxel_difference', 'checkerboard', 'descriptive_stats']
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024) if sys.platform == 'darwin' else maxrss / 1024
+
+def run_stage(stage, participant_dir):
+    # Body of one stage, run inside the measured child process
+    import SimpleITK as sitk
+    from bone_utils import load_labels, crop_image
+    from participant_run import run_participant, bone_path
+
+    if stage == 'crop':
+        ct = sitk.ReadImage(os.path.join(participant_dir, f"{PARTICIPANT}_{VISITS[0]}_CAL.nii.gz"))
+        label_map = sitk.ReadImage(os.path.join(participant_dir, f"{PARTICIPANT}_{VISITS[0]}_labels.nii.gz"))
+        output_dir = os.path.join(participant_dir, 'crop')
+        os.makedirs(output_dir, exist_ok=True)
+        for label, description in load_labels():
+            cropped_image, _ = crop_image(ct, sitk.Equal(label_map, label))
+            sitk.WriteImage(cropped_image, os.path.join(output_dir, f"{PARTICIPANT}_{VISITS[0]}_CAL_{description}_cropped.nii.gz"))
+    elif stage == 'descriptive_stats':
+        from descriptive_stats import masked_statistics
+        for _, description in load_labels():
+            mask = sitk.ReadImage(bone_path(participant_dir, PARTICIPANT, VISITS[0], description, 'cropped_common_mask'))
+            images = [sitk.ReadImage(bone_path(participant_dir, PARTICIPANT, visit, description, 'common')) for visit in VISITS]
+            masked_statistics(mask, images, names=VISITS)
+    else:
+        stages = {'voxel_difference': 'difference'}
+        run_participant(participant_dir, stages=[stages.get(stage, stage)], slice_number=5)
+
+def _child_command(stage, participant_dir, threads=None):
+    code = (f"import sys; sys.path.insert(0, {SCRIPT_DIR!r}); import benchmark; "
+            f"benchmark._child({stage!r}, {participant_dir!r}, {threads!r})")
+    return [sys.executable, '-c', code]
+
+def measure_stage(stage, participant_dir):
+    # Run one stage in a fresh interpreter so its peak memory is not hidden by earlier stages
+    output = subprocess.run(_child_command(stage, participant_dir), capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def _child(stage, participant_dir, threads=None):
+    import SimpleITK  # noqa: F401, imported before the baseline so its footprint is not counted as stage memory
+    import numpy  # noqa: F401
+    if threads is not None:
+        from concurrency import set_threads
+        set_threads(threads)
+    base_rss = peak_rss_mb()
+    wall, cpu = time.perf_counter(), time.process_time()
+    run_stage(stage, participant_dir)
+    print(json.dumps({'wall_s': time.perf_counter() - wall, 'cpu_s': time.process_time() - cpu,
+                      'peak_rss_mb': peak_rss_mb(), 'base_rss_mb': base_rss}))
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPT_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmark(sizes=('small',), stages=STAGES, repeat=1, work_dir=None, results_path=RESULTS_PATH):
+    """
+    Time and memory-profile every pipeline stage on synthetic phantoms of several sizes.
+
+    Each size gets a fresh phantom participant; stages run in pipeline order, each in its own process,
+    so later stages consume the outputs of earlier ones. Results are appended to results_path (JSON lines)
+    under one run ID, so runs can be compared over time with compare_runs.
+
+    Parameters:
+    - sizes: sequence of str, keys of phantom.SIZES
+    - stages: sequence of str, stages to measure (see STAGES); stages they depend on run unmeasured
+    - repeat: int, measurements per stage; the fastest is kept
+    - work_dir: str, directory for the phantoms (default: a temporary directory)
+    - results_path: str, JSON-lines file the results are appended to
+
+    Returns:
+    - list of dict, one per size and stage
+    """
+    from phantom import SIZES, write_phantom
+
+    run = {'run_id': time.strftime('%Y%m%dT%H%M%S'), 'commit': git_commit(), 'host': platform.node(),
+           'python': platform.python_version(), 'cpus': os.cpu_count()}
+    records = []
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp_dir:
+        for size in sizes:
+            participant_dir = write_phantom(os.path.join(tmp_dir, size), SIZES[size], PARTICIPANT, VISITS)
+            for stage in STAGES:
+                measured = stage in stages
+                runs = [measure_stage(stage, participant_dir) for _ in range(repeat if measured else 1)]
+                if not measured:
+                    continue
+                best = min(runs, key=lambda r: r['wall_s'])
+                record = {**run, 'size': size, 'shape': list(SIZES[size]), 'stage': stage, **best}
+                records.append(record)
+                print(f"{size:<8} {stage:<20} {best['wall_s']:8.2f} s wall {best['cpu_s']:8.2f} s cpu "
+                      f"{best['peak_rss_mb']:8.0f} MB peak ({best['peak_rss_mb'] - best['base_rss_mb']:.0f} MB above baseline)")
+
+    with open(results_path, 'a') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+    return records
+
+def prepare_stage(stage, participant_dir):
+    # Run the stages before `stage` unmeasured, so its inputs exist
+    for previous in STAGES[:STAGES.index(stage)]:
+        measure_stage(previous, participant_dir)
+
+def measure_split(stage, participant_dirs, threads):
+    # Run the stage on every participant copy at once, one process each, limited to `threads` threads
+    processes = [subprocess.Popen(_child_command(stage, participant_dir, threads), stdout=subprocess.PIPE, text=True)
+                 for participant_dir in participant_dirs]
+    start = time.perf_counter()
+    outputs = [process.communicate()[0] for process in processes]
+    wall = time.perf_counter() - start
+    if any(process.returncode for process in processes):
+        raise RuntimeError(f"Stage {stage} failed with {threads} threads")
+    runs = [json.loads(output.strip().splitlines()[-1]) for output in outputs]
+    return {'wall_s': wall, 'cpu_s': sum(r['cpu_s'] for r in runs), 'peak_rss_mb': max(r['peak_rss_mb'] for r in runs)}
+
+def benchmark_thread_split(stage, size='small', cores=None, repeat=1, work_dir=None, results_path=SPLIT_RESULTS_PATH):
+    """
+    Find the split of the cores between worker processes and SimpleITK/BLAS threads that gives a stage
+    the highest throughput.
+
+    For each split of `cores` into workers x threads, that many copies of the phantom participant are
+    processed at once, one process per copy, each limited to the given threads (as concurrency.process_pool
+    does). Throughput is participants per second. Results are appended to results_path (JSON lines).
+
+    Parameters:
+    - stage: str, stage to measure (see STAGES)
+    - size: str, key of phantom.SIZES
+    - cores: int, cores to divide (default: concurrency.available_cores)
+    - repeat: int, measurements per split; the fastest is kept
+    - work_dir: str, directory for the phantoms (default: a temporary directory)
+    - results_path: str, JSON-lines file the results are appended to
+
+    Returns:
+    - list of dict, one per split, and the best of them
+    """
+    from phantom import SIZES, write_phantom
+    from concurrency import available_cores
+
+    cores = cores or available_cores()
+    splits = [(workers, cores // workers) for workers in range(1, cores + 1) if cores % workers == 0]
+    run = {'run_id': time.strftime('%Y%m%dT%H%M%S'), 'commit': git_commit(), 'host': platform.node(), 'cpus': os.cpu_count()}
+    records = []
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp_dir:
+        source = write_phantom(os.path.join(tmp_dir, 'source'), SIZES[size], PARTICIPANT, VISITS)
+        prepare_stage(stage, source)
+        for workers, threads in splits:
+            participant_dirs = []
+            for i in range(workers):
+                participant_dir = os.path.join(tmp_dir, f"{workers}_{i}", PARTICIPANT)
+                shutil.copytree(source, participant_dir)
+                participant_dirs.append(participant_dir)
+            best = min((measure_split(stage, participant_dirs, threads) for _ in range(repeat)), key=lambda r: r['wall_s'])
+            for participant_dir in participant_dirs:
+                shutil.rmtree(os.path.dirname(participant_dir))
+            record = {**run, 'size': size, 'stage': stage, 'cores': cores, 'workers': workers, 'threads': threads,
+                      **best, 'participants_per_s': workers / best['wall_s']}
+            records.append(record)
+            print(f"{stage:<20} {workers:>3} workers x {threads:>3} threads {best['wall_s']:8.2f} s wall "
+                  f"{record['participants_per_s']:8.3f} participants/s")
+
+    with open(results_path, 'a') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+    best = max(records, key=lambda r: r['participants_per_s'])
+    print(f"Best split for {stage} ({size}): SALTACII_WORKERS={best['workers']} SALTACII_THREADS={best['threads']}")
+    return records, best
+
+def compare_runs(results_path=RESULTS_PATH, baseline=None, current=None):
+    """
+    Compare the wall time and peak memory of two benchmark runs, stage by stage.
+
+    Parameters:
+    - results_path: str, JSON-lines results file
+    - baseline, current: str, run IDs to compare (default: the last two runs)
+
+    Returns:
+    - pandas DataFrame indexed by size and stage
+    """
+    import pandas as pd
+    df = pd.read_json(results_path, lines=True, dtype={'run_id': str})
+    runs = list(dict.fromkeys(df['run_id']))
+    if current is None:
+        current = runs[-1]
+    if baseline is None:
+        earlier = runs[:runs.index(current)]
+        if not earlier:
+            raise ValueError("Need at least two benchmark runs to compare.")
+        baseline = earlier[-1]
+    a = df[df['run_id'] == baseline].set_index(['size', 'stage'])
+    b = df[df['run_id'] == current].set_index(['size', 'stage'])
+    comparison = pd.DataFrame({
+        f'Wall {baseline}': a['wall_s'], f'Wall {current}': b['wall_s'], 'Wall Ratio': b['wall_s'] / a['wall_s'],
+        f'Peak MB {baseline}': a['peak_rss_mb'], f'Peak MB {current}': b['peak_rss_mb'],
+    }).dropna(how='all')
+    return comparison
+
+def main():
+    from phantom import SIZES
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on synthetic CT phantoms.")
+    parser.add_argument('--sizes', type=str, nargs='+', choices=list(SIZES), default=['small'], help='Phantom sizes (default: small)')
+    parser.add_argument('--stages', type=str, nargs='+', choices=STAGES, default=STAGES, help='Stages to measure (default: all)')
+    parser.add_argument('--repeat', type=int, default=1, help='Measurements per stage, the fastest is kept (default: 1)')
+    parser.add_argument('--work_dir', type=str, help='Directory for the phantoms (default: system temp)')
+    parser.add_argument('--results', type=str, default=RESULTS_PATH, help='JSON-lines results file (default: benchmark_results.jsonl)')
+    parser.add_argument('--compare', type=str, nargs='*', help='Compare two runs (run IDs, default: the last two) instead of running')
+    parser.add_argument('--thread_split', type=str, choices=STAGES, help='Find the best workers x threads split for this stage instead')
+    parser.add_argument('--cores', type=int, help='Cores divided by --thread_split (default: all available)')
+    args = parser.parse_args()
+
+    if args.thread_split is not None:
+        for size in args.sizes:
+            benchmark_thread_split(args.thread_split, size, args.cores, args.repeat, args.work_dir)
+        return
+
+    if args.compare is not None:
+        print(compare_runs(args.results, *args.compare[:2]).to_string(float_format=lambda v: f"{v:.2f}"))
+        return
+    run_benchmark(args.sizes, args.stages, args.repeat, args.work_dir, args.results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import SimpleITK as sitk
+import numpy as np
+import csv
+import os
+
+import instrumentation  # noqa: F401, traces SimpleITK calls when SALTACII_TRACE is set
+
+# Labels and descriptions of the ML segmentation, e.g. 1 -> Femur Right
+LABELS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ML_labels.csv')
+
+def load_labels(path=LABELS_PATH, label_of_interest=None):
+    """
+    Read the segmentation labels without pulling in pandas.
+
+    Parameters:
+    - path: str, CSV with IND and LABEL columns
+    - label_of_interest: int, only return this label (optional)
+
+    Returns:
+    - list of (label, description) with spaces in the description replaced by underscores for filenames
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        labels = [(int(row['IND']), row['LABEL'].replace(" ", "_")) for row in csv.DictReader(f)]
+    if label_of_interest is not None:
+        labels = [(label, description) for label, description in labels if label == label_of_interest]
+    return labels
+
+def label_mask(mask_image, label, kernel_radius):
+    # Binary mask of one label, dilated by kernel_radius voxels in each dimension
+    binary_mask = sitk.Equal(mask_image, label)
+    return sitk.BinaryDilate(binary_mask, [int(r) for r in kernel_radius])
+
+def find_mask_bounds(mask_sitk):
+    # Bounds of the non-zero voxels in array (z, y, x) order; projections avoid building the full index arrays
+    mask_array = sitk.GetArrayViewFromImage(mask_sitk) != 0
+    bounds = []
+    for axis in range(3):
+        occupied = np.flatnonzero(mask_array.any(axis=tuple(a for a in range(3) if a != axis)))
+        if occupied.size == 0:
+            raise ValueError("Mask is empty.")
+        bounds.append((occupied[0], occupied[-1]))
+    return tuple(bounds)
+
+def mask_region(mask_sitk, buffer=30):
+    # Index and size (x, y, z) of the mask's bounding box grown by buffer voxels, clipped to the image
+    (min_x, max_x), (min_y, max_y), (min_z, max_z) = find_mask_bounds(mask_sitk)
+    min_x = max(min_x - buffer, 0)
+    max_x = min(max_x + buffer, mask_sitk.GetSize()[2] - 1)
+    min_y = max(min_y - buffer, 0)
+    max_y = min(max_y + buffer, mask_sitk.GetSize()[1] - 1)
+    min_z = max(min_z - buffer, 0)
+    max_z = min(max_z + buffer, mask_sitk.GetSize()[0] - 1)
+    extract_index = [int(min_z), int(min_y), int(min_x)]
+    extract_size = [int(max_z - min_z + 1), int(max_y - min_y + 1), int(max_x - min_x + 1)]
+    return extract_index, extract_size
+
+def crop_image(image_sitk, mask_sitk, buffer=30):
+    #Crops an image and its corresponding mask image with a buffer on the outside so that it is not exactly down to the mask.
+    extract_index, extract_size = mask_region(mask_sitk, buffer)
+    extractor = sitk.RegionOfInterestImageFilter()
+    extractor.SetSize(extract_size)
+    extractor.SetIndex(extract_index)
+    cropped_image = extractor.Execute(image_sitk)
+    cropped_mask = extractor.Execute(mask_sitk)
+    return cropped_image, cropped_mask
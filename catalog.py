@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import os
+import re
+import pandas as pd
+
+CATALOG_FILENAME = '.saltacii_catalog.parquet'
+
+COLUMNS = ['path', 'participant', 'visit', 'followup_visit', 'bone', 'side', 'product', 'sigma', 'mtime_ns', 'size']
+
+# {participant}_{visit}[_{followup visit}]_{Bone}_{Side}[_{product}].nii[.gz], as written by the pipeline scripts
+IMAGE_PATTERN = re.compile(
+    r'^(?P<participant>[A-Za-z]+_\d+)_(?P<visit>V[0-9A-Z]+)(?:_(?P<followup_visit>V[0-9A-Z]+))?'
+    r'_(?P<bone>[A-Z][a-z]+)_(?P<side>Left|Right)(?:_(?P<suffix>[A-Za-z_]+?(?:_\d+(?:\.\d+)?)?))?\.nii(?:\.gz)?$')
+
+# Calibrated CT the pipeline starts from, e.g. SALTACII_0004_V1_CAL.nii.gz
+CALIBRATED_PATTERN = re.compile(r'^(?P<participant>[A-Za-z]+_\d+)_(?P<visit>V[0-9A-Z]+)_CAL\.nii(?:\.gz)?$')
+
+SIGMA_PATTERN = re.compile(r'^difference_gaussian_sigma_(?P<sigma>\d+(?:\.\d+)?)$')
+
+# File suffix -> product type (extract.py, extract_crop.py, treece_crop.py, registration, common_region_crop.py, crm.py, compartments.py,
+# voxel_difference.py)
+PRODUCTS = {
+    None: 'masked',
+    'mask': 'mask',
+    'cropped': 'cropped',
+    'cropped_mask': 'cropped_mask',
+    'treece_cropped': 'treece_cropped',
+    'treece_cropped_mask': 'treece_cropped_mask',
+    'Transformed': 'transformed',
+    'cropped_Transformed': 'transformed',
+    'common': 'common',
+    'common_region': 'common_region',
+    'cropped_common_mask': 'cropped_common_mask',
+    'common_mask': 'common_mask',
+    'compartments': 'compartments',
+    'difference': 'difference',
+}
+
+def parse_image_name(fn):
+    """
+    Parse a pipeline file name into typed catalog fields.
+
+    Parameters:
+    - fn: str, file name or path, e.g. SALTACII_0004_V1_V2_Femur_Left_difference_gaussian_sigma_1.0.nii.gz
+
+    Returns:
+    - dict with participant, visit, followup_visit, bone, side, product and sigma, or None if the name is not recognised
+    """
+    base_name = os.path.basename(fn)
+    match = CALIBRATED_PATTERN.match(base_name)
+    if match:
+        return {'participant': match['participant'], 'visit': match['visit'], 'followup_visit': None,
+                'bone': None, 'side': None, 'product': 'calibrated', 'sigma': float('nan')}
+
+    match = IMAGE_PATTERN.match(base_name)
+    if match is None:
+        return None
+    suffix = match['suffix']
+    sigma = float('nan')
+    if suffix in PRODUCTS:
+        product = PRODUCTS[suffix]
+    elif SIGMA_PATTERN.match(suffix):
+        product = 'difference_gaussian'
+        sigma = float(SIGMA_PATTERN.match(suffix)['sigma'])
+    else:
+        return None
+    return {'participant': match['participant'], 'visit': match['visit'], 'followup_visit': match['followup_visit'],
+            'bone': match['bone'], 'side': match['side'], 'product': product, 'sigma': sigma}
+
+def scan_images(root, participant_prefix='SALTACII_'):
+    # Walk the participant directories under the study root, yielding (path, stat) for every NIfTI file
+    with os.scandir(root) as entries:
+        top_level = [e.path for e in entries if e.is_dir() and e.name.startswith(participant_prefix)]
+    stack = top_level
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith('.nii.gz') or entry.name.endswith('.nii'):
+                    yield entry.path, entry.stat()
+
+def empty_catalog():
+    return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in zip(
+        COLUMNS, ['str', 'str', 'str', 'str', 'str', 'str', 'str', 'float64', 'int64', 'int64'])})
+
+def refresh_catalog(root, index_path=None, participant_prefix='SALTACII_'):
+    """
+    Scan a study root and update its persisted catalog, re-parsing only new or modified files.
+
+    Parameters:
+    - root: str, study root containing one directory per participant
+    - index_path: str, path of the Parquet index (default: .saltacii_catalog.parquet in the root)
+    - participant_prefix: str, only top-level directories starting with this prefix are scanned
+
+    Returns:
+    - catalog: pandas DataFrame with one row per recognised image
+    - changed: list of str, paths that are new or modified since the last refresh
+    """
+    if index_path is None:
+        index_path = os.path.join(root, CATALOG_FILENAME)
+    previous = pd.read_parquet(index_path) if os.path.exists(index_path) else empty_catalog()
+    known = dict(zip(previous['path'], zip(previous['mtime_ns'], previous['size'])))
+
+    keep, rows, changed = [], [], []
+    for path, stat in scan_images(root, participant_prefix):
+        if known.get(path) == (stat.st_mtime_ns, stat.st_size):
+            keep.append(path)
+            continue
+        fields = parse_image_name(path)
+        if fields is None:
+            continue
+        rows.append({'path': path, **fields, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size})
+        changed.append(path)
+
+    catalog = pd.concat([previous[previous['path'].isin(keep)], pd.DataFrame(rows, columns=COLUMNS)], ignore_index=True)
+    catalog = catalog.sort_values('path', ignore_index=True)
+
+    # Only rewrite the index when something was added, changed or removed
+    if changed or len(keep) != len(previous):
+        tmp_path = f"{index_path}.tmp"
+        catalog.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, index_path)
+    return catalog, changed
+
+def load_catalog(root, index_path=None, participant_prefix='SALTACII_'):
+    return refresh_catalog(root, index_path, participant_prefix)[0]
+
+def select(catalog, product=None, bone=None, side=None, participants=None, visits=None, followup_visits=None, sigma=None):
+    # Filter the catalog on any combination of its typed columns
+    keep = pd.Series(True, index=catalog.index)
+    if product is not None:
+        keep &= catalog['product'] == product
+    if bone is not None:
+        keep &= catalog['bone'] == bone
+    if side is not None:
+        keep &= catalog['side'] == side
+    if participants is not None:
+        keep &= catalog['participant'].isin(participants)
+    if visits is not None:
+        keep &= catalog['visit'].isin(visits)
+    if followup_visits is not None:
+        keep &= catalog['followup_visit'].isin(followup_visits)
+    if sigma is not None:
+        keep &= catalog['sigma'] == sigma
+    return catalog[keep]
+
+def select_paths(catalog, **filters):
+    return select(catalog, **filters)['path'].tolist()
+
+def compartment_maps(catalog, paths):
+    """
+    Compartment label map of each image, found by participant, bone and side (see compartments.py).
+
+    Every *_common and difference image of a bone shares the grid of the bone's single label map, which is
+    segmented on the baseline visit. Images of bones without a label map are left out.
+
+    Returns:
+    - dict mapping image path to label map path
+    """
+    maps = select(catalog, product='compartments')
+    # Latest label map of each bone, in case a bone was segmented on more than one baseline
+    maps = maps.sort_values('mtime_ns').drop_duplicates(['participant', 'bone', 'side'], keep='last')
+    by_bone = dict(zip(maps[['participant', 'bone', 'side']].itertuples(index=False, name=None), maps['path']))
+    images = catalog[catalog['path'].isin(paths)]
+    keys = images[['participant', 'bone', 'side']].itertuples(index=False, name=None)
+    return {path: by_bone[key] for path, key in zip(images['path'], keys) if key in by_bone}
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or refresh the image catalog of a study root.")
+    parser.add_argument('study_root', type=str, help='Directory containing one folder per participant')
+    parser.add_argument('--index_path', type=str, help='Path of the catalog index (default: .saltacii_catalog.parquet in the study root)')
+    parser.add_argument('--participant_prefix', type=str, default='SALTACII_', help="Prefix of participant folders (default: 'SALTACII_')")
+    args = parser.parse_args()
+
+    catalog, changed = refresh_catalog(args.study_root, args.index_path, args.participant_prefix)
+    print(f"{len(catalog)} images catalogued, {len(changed)} new or modified")
+    print(catalog.groupby(['bone', 'product'], dropna=False).size().to_string())
+
+if __name__ == "__main__":
+    main()
@@ -7,50 +7,62 @@ Created on Wed Aug  7 16:29:02 2024
 """
 
 import SimpleITK as sitk
-import matplotlib.pyplot as plt
 import argparse
 import os
 
-# Set up argument parser
-parser = argparse.ArgumentParser(description='Generate and display a checkerboard image from two images.')
-parser.add_argument('baseline_image', type=str, help='Path to the baseline image.')
-parser.add_argument('followup_image', type=str, help='Path to the followup image.')
-parser.add_argument('baseline_label', type=str, help='Baseline image label for naming')
-parser.add_argument('followup_label', type=str, help='Followup image label for naming')
-parser.add_argument('--checker_squares', type=int, nargs='+', default=[20,20,20], help='Number of squares in checkerboard (e.g., 20 20 20)')
-parser.add_argument('--slice', type=int, default=50, help='Slice number shown in figure')
+import instrumentation  # noqa: F401, traces SimpleITK calls when SALTACII_TRACE is set
 
-args = parser.parse_args()
+def checkerboard_filename(baseline_path, baseline_label, followup_label, slice_number):
+    # Extract the directory and base name from the main image path
+    output_directory = os.path.dirname(baseline_path)
+    main_image_base_name = os.path.basename(baseline_path).replace('_common.nii.gz', '').replace('V1', f"{baseline_label}_{followup_label}")
+    # Define the subdirectory for outputs
+    output_subdir = os.path.join(output_directory, "Registration_Checkerboards")
+    # Save the resulting checkerboard figures with the following filename
+    return os.path.join(output_subdir, f"{main_image_base_name}_checkerboard_{slice_number}.png")
 
-# Read the fixed and registered images
-fixed_image = sitk.ReadImage(args.baseline_image)
-registered_image = sitk.ReadImage(args.followup_image)
+def save_checkerboard(fixed_image, registered_image, output_filename, baseline_label, followup_label, checker_squares=(20, 20, 20), slice_number=50):
+    # matplotlib is only needed here, and the figure is only saved, so the non-interactive backend is enough
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
 
-# Create a checker square for each dimension
-checker_squares = [int(s) for s in args.checker_squares]
+    # Generate the checkerboard image
+    checkerboard_image = sitk.CheckerBoard(fixed_image, registered_image, [int(s) for s in checker_squares])
 
-# Generate the checkerboard image
-checkerboard_image = sitk.CheckerBoard(fixed_image, registered_image, checker_squares)
+    # Only the displayed slice is converted to numpy
+    checkerboard_array = sitk.GetArrayViewFromImage(checkerboard_image)[slice_number, :, :]
 
-# Convert to numpy array for visualization
-checkerboard_array = sitk.GetArrayFromImage(checkerboard_image)
+    # Create the subdirectory if it doesn't exist
+    os.makedirs(os.path.dirname(output_filename), exist_ok=True)
 
-# Extract the directory and base name from the main image path
-output_directory = os.path.dirname(args.baseline_image)
-main_image_base_name = os.path.basename(args.baseline_image).replace('_common.nii.gz', '').replace('V1', f"{args.baseline_label}_{args.followup_label}")
-# Define the subdirectory for outputs
-output_subdir = os.path.join(output_directory, "Registration_Checkerboards")
+    # Display the checkerboard image
+    fig = plt.figure(figsize=(10, 10))
+    plt.imshow(checkerboard_array, cmap='gray')
+    plt.title(f"Checkerboard of {baseline_label} and {followup_label} Images (Slice:{slice_number})")
+    plt.axis('off')
 
-# Create the subdirectory if it doesn't exist
-os.makedirs(output_subdir, exist_ok=True)
+    plt.savefig(output_filename)
+    plt.close(fig)
 
-# Save the resulting checkerboard figures with the following filename
-output_filename = os.path.join(output_subdir, f"{main_image_base_name}_checkerboard_{args.slice}.png")
+def main():
+    # Set up argument parser
+    parser = argparse.ArgumentParser(description='Generate and display a checkerboard image from two images.')
+    parser.add_argument('baseline_image', type=str, help='Path to the baseline image.')
+    parser.add_argument('followup_image', type=str, help='Path to the followup image.')
+    parser.add_argument('baseline_label', type=str, help='Baseline image label for naming')
+    parser.add_argument('followup_label', type=str, help='Followup image label for naming')
+    parser.add_argument('--checker_squares', type=int, nargs='+', default=[20,20,20], help='Number of squares in checkerboard (e.g., 20 20 20)')
+    parser.add_argument('--slice', type=int, default=50, help='Slice number shown in figure')
 
-# Display the checkerboard image
-plt.figure(figsize=(10, 10))
-plt.imshow(checkerboard_array[args.slice, :, :], cmap='gray')
-plt.title(f"Checkerboard of {args.baseline_label} and {args.followup_label} Images (Slice:{args.slice})")
-plt.axis('off')
+    args = parser.parse_args()
 
-plt.savefig(output_filename)
+    # Read the fixed and registered images
+    fixed_image = sitk.ReadImage(args.baseline_image)
+    registered_image = sitk.ReadImage(args.followup_image)
+
+    output_filename = checkerboard_filename(args.baseline_image, args.baseline_label, args.followup_label, args.slice)
+    save_checkerboard(fixed_image, registered_image, output_filename, args.baseline_label, args.followup_label, args.checker_squares, args.slice)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import SimpleITK as sitk
+import numpy as np
+import argparse
+
+from instrumentation import traced
+
+# Inclusive tolerance on the region boundaries, so voxels exactly on a face are not lost to rounding
+EPSILON = 1e-6
+
+def scan_geometry(fn):
+    # Origin, spacing, direction and size of an image from its header only (nothing is decompressed)
+    reader = sitk.ImageFileReader()
+    reader.SetFileName(fn)
+    reader.ReadImageInformation()
+    return reader
+
+def index_mapping(reference, geometry, transform=None):
+    """
+    Affine map from voxel indices of the reference grid to continuous indices of another image.
+
+    Parameters:
+    - reference: sitk.Image, grid the common region is rasterized on (the baseline crop)
+    - geometry: sitk.Image or sitk.ImageFileReader (after ReadImageInformation) of the other image
+    - transform: sitk.Transform, affine map from reference points to points of the other image (None: identity)
+
+    Returns:
+    - M, c: continuous index = M @ index + c, indices in (x, y, z) order
+    """
+    def index_to_point(image):
+        direction = np.array(image.GetDirection()).reshape(3, 3)
+        return direction * np.array(image.GetSpacing()), np.array(image.GetOrigin())
+
+    A_ref, o_ref = index_to_point(reference)
+    A_geo, o_geo = index_to_point(geometry)
+    # The transform is affine (rigid), so it is recovered exactly from the images of four points
+    if transform is None:
+        T, t = np.eye(3), np.zeros(3)
+    else:
+        t = np.array(transform.TransformPoint((0.0, 0.0, 0.0)))
+        T = np.column_stack([np.array(transform.TransformPoint(tuple(e))) - t for e in np.eye(3)])
+    A_inv = np.linalg.inv(A_geo)
+    return A_inv @ T @ A_ref, A_inv @ (T @ o_ref + t - o_geo)
+
+def _linear_intervals(a, b, lower, upper):
+    # Range of x (per row) with lower <= a * x + b <= upper
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x0 = (lower - b) / a
+        x1 = (upper - b) / a
+    inside = (b >= lower) & (b <= upper)
+    lo = np.where(a > EPSILON, x0, np.where(a < -EPSILON, x1, np.where(inside, -np.inf, np.inf)))
+    hi = np.where(a > EPSILON, x1, np.where(a < -EPSILON, x0, np.where(inside, np.inf, -np.inf)))
+    return lo, hi
+
+def box_intervals(M, c, size, rows):
+    """
+    Range of x along each (y, z) row of the reference grid that maps inside the other image's box.
+
+    A voxel is inside where linear interpolation has data, i.e. -0.5 <= continuous index <= size - 0.5.
+    """
+    y, z = rows
+    lo, hi = np.full(y.shape, -np.inf), np.full(y.shape, np.inf)
+    for k in range(3):
+        b = M[k, 1] * y + M[k, 2] * z + c[k]
+        klo, khi = _linear_intervals(M[k, 0], b, -0.5 - EPSILON, size[k] - 0.5 + EPSILON)
+        lo, hi = np.maximum(lo, klo), np.minimum(hi, khi)
+    return lo, hi
+
+def cylinder_intervals(M, c, size, spacing, rows):
+    """
+    Range of x along each (y, z) row inside the reconstruction circle of a CT scan: the cylinder about the
+    scan's slice axis, centred in the slice and touching its shorter side.
+    """
+    y, z = rows
+    radius = min(size[0] * spacing[0], size[1] * spacing[1]) / 2
+    A, B, C = 0.0, 0.0, -radius ** 2
+    for k in range(2):
+        a = M[k, 0] * spacing[k]
+        b = (M[k, 1] * y + M[k, 2] * z + c[k] - (size[k] - 1) / 2) * spacing[k]
+        A, B, C = A + a * a, B + 2 * a * b, C + b * b
+    # A x^2 + B x + C <= 0
+    if A < EPSILON:
+        return np.where(C <= EPSILON, -np.inf, np.inf), np.where(C <= EPSILON, np.inf, -np.inf)
+    discriminant = B * B - 4 * A * C
+    root = np.sqrt(np.maximum(discriminant, 0.0))
+    lo = np.where(discriminant >= 0, (-B - root) / (2 * A), np.inf)
+    hi = np.where(discriminant >= 0, (-B + root) / (2 * A), -np.inf)
+    return lo, hi
+
+def rasterize(reference, lo, hi):
+    # Fill x = ceil(lo) .. floor(hi) of every (y, z) row in a single pass over the volume
+    nx = reference.GetSize()[0]
+    x = np.arange(nx)
+    first = np.ceil(lo - EPSILON).T[:, :, None]
+    last = np.floor(hi + EPSILON).T[:, :, None]
+    region = sitk.GetImageFromArray(((x >= first) & (x <= last)).astype(np.uint8))
+    region.CopyInformation(reference)
+    return region
+
+@traced
+def common_region(reference, fields_of_view, shape='box'):
+    """
+    Intersection of the fields of view of all visits on the grid of the baseline crop.
+
+    Each field of view is the box of a scan (or, with shape='cylinder', also its reconstruction circle)
+    mapped into baseline space by the visit's rigid transform. The intersection of these convex regions
+    is computed analytically per row and rasterized once. Irregular fields of view, given as masks, are
+    resampled and intersected voxel by voxel.
+
+    Parameters:
+    - reference: sitk.Image, baseline crop
+    - fields_of_view: list of (geometry, transform, mask): geometry of the visit's scan (sitk.Image or
+      header reader, see scan_geometry), transform from baseline to visit points (None for the baseline),
+      and an optional sitk.Image valid-region mask in the visit's space (None: the geometric region)
+    - shape: str, 'box' or 'cylinder'
+
+    Returns:
+    - region: sitk.Image (UInt8) on the reference grid, 1 inside every field of view
+    """
+    _, ny, nz = reference.GetSize()
+    rows = np.meshgrid(np.arange(ny, dtype=float), np.arange(nz, dtype=float), indexing='ij')
+    lo, hi = np.full((ny, nz), -np.inf), np.full((ny, nz), np.inf)
+    irregular = []
+    for geometry, transform, mask in fields_of_view:
+        if mask is not None:
+            irregular.append((mask, transform))
+            continue
+        M, c = index_mapping(reference, geometry, transform)
+        intervals = [box_intervals(M, c, geometry.GetSize(), rows)]
+        if shape == 'cylinder':
+            intervals.append(cylinder_intervals(M, c, geometry.GetSize(), geometry.GetSpacing(), rows))
+        for klo, khi in intervals:
+            lo, hi = np.maximum(lo, klo), np.minimum(hi, khi)
+
+    region = rasterize(reference, lo, hi)
+    # Fallback for irregular masks: one resampling and one logical pass each
+    for mask, transform in irregular:
+        resampled = sitk.Resample(mask, reference, transform if transform is not None else sitk.Transform(),
+                                  sitk.sitkNearestNeighbor, 0, sitk.sitkUInt8)
+        region = sitk.And(region, sitk.Cast(resampled != 0, sitk.sitkUInt8))
+    return region
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute the common region of all visits on the grid of the baseline crop.")
+    parser.add_argument('baseline_crop', type=str, help='Baseline crop (e.g. *_V1_Femur_Right_cropped.nii.gz)')
+    parser.add_argument('baseline_scan', type=str, help='Calibrated baseline CT the crop was taken from (only its header is read)')
+    parser.add_argument('--followups', type=str, nargs=2, action='append', default=[], metavar=('SCAN', 'TRANSFORM'),
+                        help='Calibrated follow-up CT and its registration transform (.tfm); repeat for each follow-up')
+    parser.add_argument('--shape', type=str, choices=['box', 'cylinder'], default='box', help='Field of view of each scan (default: box)')
+    parser.add_argument('--output', type=str, help='Output path (default: *_common_region.nii.gz next to the baseline crop)')
+    args = parser.parse_args()
+
+    reference = sitk.ReadImage(args.baseline_crop)
+    fields_of_view = [(scan_geometry(args.baseline_scan), None, None)]
+    fields_of_view += [(scan_geometry(scan), sitk.ReadTransform(transform), None) for scan, transform in args.followups]
+    region = common_region(reference, fields_of_view, args.shape)
+    output_filename = args.output or args.baseline_crop.replace('_cropped.nii.gz', '_common_region.nii.gz')
+    sitk.WriteImage(region, output_filename)
+    print(f"Common region saved to {output_filename}")
+
+if __name__ == "__main__":
+    main()
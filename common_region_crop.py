@@ -10,31 +10,42 @@ import SimpleITK as sitk
 import os
 import argparse
 
-def find_mask_bounds(mask_sitk):
-    mask_array = sitk.GetArrayFromImage(mask_sitk)
-    non_zero_indices = mask_array.nonzero()
-    min_x, max_x = non_zero_indices[0].min(), non_zero_indices[0].max()
-    min_y, max_y = non_zero_indices[1].min(), non_zero_indices[1].max()
-    min_z, max_z = non_zero_indices[2].min(), non_zero_indices[2].max()
-    return (min_x, max_x), (min_y, max_y), (min_z, max_z)
+from bone_utils import crop_image, mask_region
 
-def crop_image(image_sitk, mask_sitk, buffer=30):
-    #Crops an image and its corresponding mask image with a buffer on the outside so that it is not exactly down to the mask.
-    (min_x, max_x), (min_y, max_y), (min_z, max_z) = find_mask_bounds(mask_sitk)
-    min_x = max(min_x - buffer, 0)
-    max_x = min(max_x + buffer, mask_sitk.GetSize()[2] - 1)
-    min_y = max(min_y - buffer, 0)
-    max_y = min(max_y + buffer, mask_sitk.GetSize()[1] - 1)
-    min_z = max(min_z - buffer, 0)
-    max_z = min(max_z + buffer, mask_sitk.GetSize()[0] - 1)
-    extract_size = [int(max_z - min_z + 1), int(max_y - min_y + 1), int(max_x - min_x + 1)]
-    extract_index = [int(min_z), int(min_y), int(min_x)]
-    extractor = sitk.RegionOfInterestImageFilter()
-    extractor.SetSize(extract_size)
-    extractor.SetIndex(extract_index)
-    cropped_image = extractor.Execute(image_sitk)
-    cropped_mask = extractor.Execute(mask_sitk)
-    return cropped_image, cropped_mask
+def common_region_crop(image, common_region_mask, buffer=30):
+    # Apply the common region mask to the image
+    masked_image = sitk.Mask(image, common_region_mask)
+    
+    # Crop images
+    return crop_image(masked_image, common_region_mask, buffer=buffer)
+
+def crop_common_region_mask(common_region_mask, buffer=30):
+    # The common region mask cropped to its bounding box plus buffer: the grid of the *_common images
+    extract_index, extract_size = mask_region(common_region_mask, buffer)
+    return sitk.RegionOfInterest(common_region_mask, extract_size, extract_index)
+
+def resample_common_region(image, cropped_mask, transform=None):
+    """
+    Resample an image through its registration transform directly onto the grid of the cropped common
+    region mask and mask it.
+
+    Gives the same result as resampling the whole follow-up crop into baseline space and then running
+    common_region_crop, but only the voxels of the common region's bounding box are interpolated and
+    no full-size transformed image is created.
+
+    Parameters:
+    - image: sitk.Image, follow-up crop (or the baseline crop, with transform None)
+    - cropped_mask: sitk.Image, output of crop_common_region_mask
+    - transform: sitk.Transform, maps baseline points to points of the image (None: same grid as the baseline)
+
+    Returns:
+    - common: sitk.Image on the grid of cropped_mask
+    """
+    if transform is None:
+        region = sitk.RegionOfInterest(image, cropped_mask.GetSize(), image.TransformPhysicalPointToIndex(cropped_mask.GetOrigin()))
+    else:
+        region = sitk.Resample(image, cropped_mask, transform, sitk.sitkLinear, 0.0, image.GetPixelID())
+    return sitk.Mask(region, cropped_mask)
 
 def main(args):
     # Read the main image and the mask image
@@ -47,11 +58,13 @@ def main(args):
     output_directory = os.path.dirname(args.transformed_image_path)
     main_image_base_name = os.path.basename(args.transformed_image_path).replace('_Transformed.nii.gz', '').replace('_cropped.nii.gz','')
 
-    # Apply the dilated mask to the main image
-    masked_image = sitk.Mask(main_image, mask_image)
-    
-    # Crop images
-    cropped_image, cropped_mask = crop_image(masked_image, mask_image, buffer=args.buffer)
+    # Mask and crop the image to the common region; with a registration transform the crop is resampled
+    # straight onto the common region instead of being transformed in full first
+    if args.transform is not None:
+        cropped_mask = crop_common_region_mask(mask_image, buffer=args.buffer)
+        cropped_image = resample_common_region(main_image, cropped_mask, sitk.ReadTransform(args.transform))
+    else:
+        cropped_image, cropped_mask = common_region_crop(main_image, mask_image, buffer=args.buffer)
     
     # Extract the directory and base name from the main image path
     output_filename = os.path.join(output_directory, f"{main_image_base_name}_common.nii.gz")
@@ -72,9 +85,10 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Extract and Crop the images to the size of the common region mask")
     
     # Define command-line arguments
-    parser.add_argument('transformed_image_path', type=str, help='Path to the transformed image')
+    parser.add_argument('transformed_image_path', type=str, help='Path to the transformed image (or the follow-up crop with --transform)')
     parser.add_argument('common_region_mask_path', type=str, help='Path to the common region mask')
     parser.add_argument('--buffer', type=int, default=30, help="Buffer size around the mask (default: 30).")
+    parser.add_argument('--transform', type=str, help='Registration transform (.tfm) of the follow-up crop given as the first argument (optional)')
     parser.add_argument('--cropped_mask', type=bool, default = False, help="Make a cropped mask file.")
 
     # Parse arguments
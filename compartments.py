@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import SimpleITK as sitk
+import numpy as np
+import argparse
+
+from image_io import read_image, write_image, array_to_image
+from bone_utils import mask_region
+from instrumentation import traced
+
+# Label -> name of the compartments in a *_compartments.nii.gz label map (0 = neither)
+COMPARTMENTS = {1: 'Cortical', 2: 'Trabecular'}
+
+# Compartment of the whole-bone statistics rows (results_store.py writes and filters on it)
+WHOLE_BONE = 'Whole'
+
+# Cortical bone is dense bone (mg HA/cm³) within max_depth_mm of the bone surface; voxels closer to the
+# surface than rim_mm that are not dense are partial-volume voxels of the dilated mask and left out
+DEFAULT_PARAMETERS = {
+    'cortical_threshold': 450.0,
+    'max_depth_mm': 5.0,
+    'rim_mm': 1.0,
+    'closing_radius': 1,
+    'in_plane': True,
+}
+
+@traced
+def segment_compartments(mask, image, cortical_threshold=450.0, max_depth_mm=5.0, rim_mm=1.0, closing_radius=1, in_plane=True):
+    """
+    Split a bone mask into cortical and trabecular compartments.
+
+    The depth of every mask voxel below the bone surface comes from one distance transform of the mask,
+    computed on the mask's bounding box only. Cortical voxels are the voxels above cortical_threshold within
+    max_depth_mm of the surface, with pores up to closing_radius closed; the rest of the mask deeper than
+    rim_mm is trabecular (including the marrow).
+
+    Parameters:
+    - mask: sitk.Image, bone mask on the grid of the image (e.g. *_cropped_common_mask)
+    - image: sitk.Image, calibrated BMD image (e.g. the baseline *_common image)
+    - cortical_threshold: float, lowest density of cortical bone
+    - max_depth_mm: float, deepest extent of the cortex below the surface
+    - rim_mm: float, depth below which voxels that are not cortical are left out
+    - closing_radius: int, radius (voxels) of the closing that fills cortical pores (0: none)
+    - in_plane: bool, measure depth within each axial slice, so the faces where the crop cuts the bone
+      are not taken for its surface
+
+    Returns:
+    - labels: sitk.Image (UInt8) on the grid of the mask, labelled as in COMPARTMENTS
+    """
+    index, size = mask_region(mask, buffer=1)
+    mask_roi = sitk.Cast(sitk.RegionOfInterest(mask, size, index) != 0, sitk.sitkUInt8)
+    image_roi = sitk.RegionOfInterest(image, size, index)
+
+    # The bounding box is clipped at the image border, so a mask touching the edge of the crop would have no
+    # background on that side; one voxel of padding makes the border count as bone surface
+    depth_mask = sitk.ConstantPad(mask_roi, [1, 1, 1], [1, 1, 1], 0)
+    if in_plane:
+        # A slice step longer than the slice itself puts the nearest background voxel in the same slice
+        spacing = mask_roi.GetSpacing()
+        depth_mask.SetSpacing((spacing[0], spacing[1], spacing[0] * (size[0] + 2) + spacing[1] * (size[1] + 2)))
+    depth_image = sitk.SignedMaurerDistanceMap(depth_mask, insideIsPositive=True, squaredDistance=False, useImageSpacing=True)
+    depth = sitk.GetArrayViewFromImage(depth_image)[1:-1, 1:-1, 1:-1]
+    values = sitk.GetArrayViewFromImage(image_roi)
+    inside = sitk.GetArrayViewFromImage(mask_roi) != 0
+
+    band = inside & (depth <= max_depth_mm)
+    cortical = band & (values >= cortical_threshold)
+    if closing_radius > 0:
+        closed_image = sitk.BinaryMorphologicalClosing(array_to_image(cortical.astype(np.uint8), mask_roi), [closing_radius] * 3)
+        cortical = band & (sitk.GetArrayViewFromImage(closed_image) != 0)
+    trabecular = inside & ~cortical & (depth > rim_mm)
+
+    # Paste the bounding box back into a label map on the full grid of the mask
+    labels = np.zeros(mask.GetSize()[::-1], dtype=np.uint8)
+    roi = labels[index[2]:index[2] + size[2], index[1]:index[1] + size[1], index[0]:index[0] + size[0]]
+    roi[cortical] = 1
+    roi[trabecular] = 2
+    return array_to_image(labels, reference=mask)
+
+def compartments_path(mask_fn):
+    # e.g. SALTACII_0004_V1_Femur_Right_cropped_common_mask.nii.gz -> SALTACII_0004_V1_Femur_Right_compartments.nii.gz
+    return mask_fn.replace('_cropped_common_mask.nii.gz', '_compartments.nii.gz')
+
+def main():
+    parser = argparse.ArgumentParser(description="Segment the cortical and trabecular compartments of a bone in the common region.")
+    parser.add_argument('mask_path', type=str, help='Bone mask of the common images (*_cropped_common_mask.nii.gz)')
+    parser.add_argument('image_path', type=str, help='Baseline common image (*_common.nii.gz)')
+    parser.add_argument('--output', type=str, help='Output path (default: *_compartments.nii.gz next to the mask)')
+    parser.add_argument('--cortical_threshold', type=float, default=DEFAULT_PARAMETERS['cortical_threshold'], help='Lowest density of cortical bone')
+    parser.add_argument('--max_depth_mm', type=float, default=DEFAULT_PARAMETERS['max_depth_mm'], help='Deepest extent of the cortex below the surface (mm)')
+    parser.add_argument('--rim_mm', type=float, default=DEFAULT_PARAMETERS['rim_mm'], help='Surface rim left out unless cortical (mm)')
+    parser.add_argument('--closing_radius', type=int, default=DEFAULT_PARAMETERS['closing_radius'], help='Radius of the closing filling cortical pores (voxels)')
+    parser.add_argument('--volumetric', action='store_true', help='Measure depth in 3D instead of within each axial slice')
+    args = parser.parse_args()
+
+    labels = segment_compartments(read_image(args.mask_path), read_image(args.image_path), args.cortical_threshold,
+                                  args.max_depth_mm, args.rim_mm, args.closing_radius, not args.volumetric)
+    output_filename = args.output or compartments_path(args.mask_path)
+    write_image(labels, output_filename)
+    counts = np.bincount(sitk.GetArrayViewFromImage(labels).ravel(), minlength=len(COMPARTMENTS) + 1)
+    print(", ".join(f"{name}: {counts[label]} voxels" for label, name in COMPARTMENTS.items()))
+    print(f"Compartments saved to {output_filename}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Global concurrency setting: SALTACII_WORKERS worker processes with SALTACII_THREADS threads each.
+# Unset, the workers default to one per core and the cores are divided evenly between them.
+WORKERS_ENV = 'SALTACII_WORKERS'
+THREADS_ENV = 'SALTACII_THREADS'
+CORES_ENV = 'SALTACII_CORES'
+
+# Thread pools of the numerical libraries NumPy and SciPy may be linked against
+THREAD_ENV_VARS = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS']
+
+def available_cores():
+    # Cores this process may run on (respects taskset/cgroup affinity); SALTACII_CORES overrides it
+    if os.environ.get(CORES_ENV):
+        return int(os.environ[CORES_ENV])
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def thread_split(max_workers=None):
+    """
+    Divide the cores between worker processes and the threads inside each one.
+
+    Parameters:
+    - max_workers: int, number of worker processes (default: SALTACII_WORKERS, else one per core)
+
+    Returns:
+    - (workers, threads per worker); threads come from SALTACII_THREADS if set
+    """
+    cores = available_cores()
+    workers = max_workers or int(os.environ.get(WORKERS_ENV) or 0) or cores
+    threads = int(os.environ.get(THREADS_ENV) or 0) or max(1, cores // workers)
+    return workers, threads
+
+def set_threads(threads, itk=True):
+    """
+    Limit the threads of SimpleITK filters and of the BLAS/OpenMP pools in this process.
+
+    The environment variables only reach libraries loaded after this call (and child processes);
+    pools that are already loaded are limited through threadpoolctl when it is installed.
+
+    Parameters:
+    - threads: int, threads per process
+    - itk: bool, also set the SimpleITK global default (imports SimpleITK)
+    """
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    if itk:
+        import SimpleITK as sitk
+        sitk.ProcessObject.SetGlobalDefaultNumberOfThreads(threads)
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    threadpool_limits(threads)
+
+def _worker_init(threads, itk, initializer, initargs):
+    set_threads(threads, itk)
+    if initializer is not None:
+        initializer(*initargs)
+
+def process_pool(max_workers=None, initializer=None, initargs=(), itk=True):
+    """
+    ProcessPoolExecutor whose workers share the cores instead of each starting a thread per core.
+
+    Parameters:
+    - max_workers: int, number of worker processes (see thread_split)
+    - initializer, initargs: run in each worker after its thread limits are set
+    - itk: bool, whether the workers run SimpleITK filters (False keeps SimpleITK out of e.g. plotting workers)
+
+    Returns:
+    - ProcessPoolExecutor
+    """
+    workers, threads = thread_split(max_workers)
+    return ProcessPoolExecutor(max_workers=workers, initializer=_worker_init, initargs=(threads, itk, initializer, initargs))
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import SimpleITK as sitk
+import numpy as np
+import argparse
+import hashlib
+import json
+import os
+
+from image_io import read_image, file_hash
+from instrumentation import traced
+
+# Profiles run from inner_mm inside to outer_mm outside the dilated mask surface, every step_mm
+DEFAULT_PARAMETERS = {
+    'inner_mm': 10.0,
+    'outer_mm': 5.0,
+    'step_mm': 0.25,
+    'surface_stride': 1,
+}
+
+def index_to_physical(image):
+    # Matrix and offset turning (x, y, z) voxel indices into physical points
+    direction = np.array(image.GetDirection()).reshape(3, 3)
+    return direction * np.array(image.GetSpacing()), np.array(image.GetOrigin())
+
+@traced
+def periosteal_surface(mask, stride=1):
+    """
+    Surface points and outward normals of the (dilated) bone mask.
+
+    The points are the centres of the mask's boundary voxels; the normals are the gradient of the signed
+    distance map at those voxels, so they are smooth across voxel steps.
+
+    Parameters:
+    - mask: sitk.Image, binary bone mask (e.g. *_treece_cropped_mask)
+    - stride: int, keep every stride-th boundary voxel
+
+    Returns:
+    - points: (N, 3) float array of physical points
+    - normals: (N, 3) float array of unit outward normals (physical space)
+    """
+    mask = sitk.Cast(mask != 0, sitk.sitkUInt8)
+    contour = sitk.BinaryContour(mask, fullyConnected=False)
+    zyx = np.argwhere(sitk.GetArrayViewFromImage(contour))[::stride]
+    # Negative inside, positive outside, in mm, so its gradient points out of the bone
+    distance_image = sitk.SignedMaurerDistanceMap(mask, insideIsPositive=False, squaredDistance=False, useImageSpacing=True)
+    distance = sitk.GetArrayViewFromImage(distance_image)
+
+    # Central differences at the boundary voxels only (one-sided at the crop edges)
+    gradient = np.empty(zyx.shape, dtype=float)
+    for axis in range(3):
+        upper = zyx.copy()
+        lower = zyx.copy()
+        upper[:, axis] = np.minimum(zyx[:, axis] + 1, distance.shape[axis] - 1)
+        lower[:, axis] = np.maximum(zyx[:, axis] - 1, 0)
+        gradient[:, axis] = (distance[tuple(upper.T)] - distance[tuple(lower.T)]) / np.maximum(upper[:, axis] - lower[:, axis], 1)
+
+    # Index-space gradient (z, y, x) -> physical gradient: solve A^T g_phys = g_index
+    A, origin = index_to_physical(mask)
+    normals = np.linalg.solve(A.T, gradient[:, ::-1].T).T
+    lengths = np.linalg.norm(normals, axis=1)
+    keep = lengths > 0
+    points = zyx[keep][:, ::-1] @ A.T + origin
+    return points, normals[keep] / lengths[keep, None]
+
+@traced
+def sample_profiles(image, points, normals, inner_mm=10.0, outer_mm=5.0, step_mm=0.25):
+    """
+    Intensity profiles along the surface normals, all interpolated in one call.
+
+    Parameters:
+    - image: sitk.Image, unmasked crop (e.g. *_treece_cropped)
+    - points, normals: (N, 3) arrays from periosteal_surface
+    - inner_mm, outer_mm, step_mm: profile extent inside and outside the surface, and sample spacing
+
+    Returns:
+    - offsets: (K,) float array, signed distance of each sample along the normal (negative inside)
+    - profiles: (N, K) float32 array, linearly interpolated intensities (NaN outside the crop)
+    """
+    from scipy.ndimage import map_coordinates
+    offsets = np.arange(-inner_mm, outer_mm + step_mm / 2, step_mm)
+    A, origin = index_to_physical(image)
+    # Physical sample points -> continuous (x, y, z) indices, for all profiles at once
+    samples = points[:, None, :] + offsets[None, :, None] * normals[:, None, :]
+    indices = np.linalg.solve(A, (samples.reshape(-1, 3) - origin).T)
+    array = sitk.GetArrayViewFromImage(image).astype(np.float32)
+    profiles = map_coordinates(array, indices[::-1], order=1, mode='constant', cval=np.nan, prefilter=False)
+    return offsets, profiles.reshape(len(points), len(offsets)).astype(np.float32)
+
+def profiles_path(image_fn):
+    # e.g. SALTACII_0004_V1_Femur_Right_treece_cropped.nii.gz -> SALTACII_0004_V1_Femur_Right_profiles.npz
+    return f"{image_fn.replace('_treece_cropped.nii.gz', '').replace('.nii.gz', '')}_profiles.npz"
+
+def cached_profiles(image_fn, mask_fn, output_fn=None, parameters=None):
+    """
+    Cortical profiles of one bone, cached in an .npz file next to the crop.
+
+    The cache key covers the contents of the crop and mask and every parameter, so the profiles are only
+    sampled again when one of them changes.
+
+    Parameters:
+    - image_fn: str, unmasked crop (*_treece_cropped.nii.gz)
+    - mask_fn: str, its dilated bone mask (*_treece_cropped_mask.nii.gz)
+    - output_fn: str, cache file (default: *_profiles.npz next to the crop)
+    - parameters: dict, overrides of DEFAULT_PARAMETERS
+
+    Returns:
+    - dict with points, normals, offsets and profiles arrays
+    """
+    parameters = {**DEFAULT_PARAMETERS, **(parameters or {})}
+    output_fn = output_fn or profiles_path(image_fn)
+    key = hashlib.sha256(f"{file_hash(image_fn)}_{file_hash(mask_fn)}_{json.dumps(parameters, sort_keys=True)}".encode()).hexdigest()
+    if os.path.exists(output_fn):
+        with np.load(output_fn) as cached:
+            if str(cached['key']) == key:
+                return {name: cached[name] for name in ('points', 'normals', 'offsets', 'profiles')}
+
+    points, normals = periosteal_surface(read_image(mask_fn), parameters['surface_stride'])
+    offsets, profiles = sample_profiles(read_image(image_fn), points, normals, parameters['inner_mm'],
+                                        parameters['outer_mm'], parameters['step_mm'])
+    result = {'points': points.astype(np.float32), 'normals': normals.astype(np.float32), 'offsets': offsets, 'profiles': profiles}
+    # Write to a temporary name first so an interrupted run never leaves a partial cache file
+    tmp_filename = f"{output_fn}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_filename, key=key, **result)
+    os.replace(tmp_filename, output_fn)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Sample cortical bone profiles along the surface normals of a treece_crop output.")
+    parser.add_argument('image_path', type=str, help='Unmasked crop (*_treece_cropped.nii.gz)')
+    parser.add_argument('mask_path', type=str, help='Dilated bone mask (*_treece_cropped_mask.nii.gz)')
+    parser.add_argument('--output', type=str, help='Cache file (default: *_profiles.npz next to the crop)')
+    parser.add_argument('--inner_mm', type=float, default=DEFAULT_PARAMETERS['inner_mm'], help='Profile length inside the surface (mm)')
+    parser.add_argument('--outer_mm', type=float, default=DEFAULT_PARAMETERS['outer_mm'], help='Profile length outside the surface (mm)')
+    parser.add_argument('--step_mm', type=float, default=DEFAULT_PARAMETERS['step_mm'], help='Sample spacing along the profile (mm)')
+    parser.add_argument('--surface_stride', type=int, default=DEFAULT_PARAMETERS['surface_stride'], help='Keep every n-th surface point')
+    args = parser.parse_args()
+
+    parameters = {'inner_mm': args.inner_mm, 'outer_mm': args.outer_mm, 'step_mm': args.step_mm, 'surface_stride': args.surface_stride}
+    result = cached_profiles(args.image_path, args.mask_path, args.output, parameters)
+    print(f"{result['profiles'].shape[0]} profiles of {result['profiles'].shape[1]} samples saved to {args.output or profiles_path(args.image_path)}")
+
+if __name__ == "__main__":
+    main()
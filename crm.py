@@ -10,6 +10,12 @@ import argparse
 import SimpleITK as sitk
 import os
 
+import instrumentation  # noqa: F401, traces SimpleITK calls when SALTACII_TRACE is set
+
+def common_mask(common_region, mask):
+    # Multiply the common region by the baseline mask
+    return common_region * mask
+
 def main():
     parser = argparse.ArgumentParser(description="Multiply the common region by the baseline mask.")
     parser.add_argument("common_region_image", type=str, help="Path to the common region image.")
@@ -24,7 +30,7 @@ def main():
     mask = sitk.ReadImage(args.mask_image)
 
     # Multiply the images
-    result = common_region * mask
+    result = common_mask(common_region, mask)
     
     output_filename = os.path.join(output_directory, f"{main_image_base_name}_common_mask.nii.gz")
     
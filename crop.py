@@ -9,31 +9,8 @@ import SimpleITK as sitk
 import argparse
 import os
 
-def find_mask_bounds(mask_sitk):
-    mask_array = sitk.GetArrayFromImage(mask_sitk)
-    non_zero_indices = mask_array.nonzero()
-    min_x, max_x = non_zero_indices[0].min(), non_zero_indices[0].max()
-    min_y, max_y = non_zero_indices[1].min(), non_zero_indices[1].max()
-    min_z, max_z = non_zero_indices[2].min(), non_zero_indices[2].max()
-    return (min_x, max_x), (min_y, max_y), (min_z, max_z)
-
-def crop_image(image_sitk, mask_sitk, buffer=30):
-    #Crops an image and its corresponding mask image with a buffer on the outside so that it is not exactly down to the mask.
-    (min_x, max_x), (min_y, max_y), (min_z, max_z) = find_mask_bounds(mask_sitk)
-    min_x = max(min_x - buffer, 0)
-    max_x = min(max_x + buffer, mask_sitk.GetSize()[2] - 1)
-    min_y = max(min_y - buffer, 0)
-    max_y = min(max_y + buffer, mask_sitk.GetSize()[1] - 1)
-    min_z = max(min_z - buffer, 0)
-    max_z = min(max_z + buffer, mask_sitk.GetSize()[0] - 1)
-    extract_size = [int(max_z - min_z + 1), int(max_y - min_y + 1), int(max_x - min_x + 1)]
-    extract_index = [int(min_z), int(min_y), int(min_x)]
-    extractor = sitk.RegionOfInterestImageFilter()
-    extractor.SetSize(extract_size)
-    extractor.SetIndex(extract_index)
-    cropped_image = extractor.Execute(image_sitk)
-    cropped_mask = extractor.Execute(mask_sitk)
-    return cropped_image, cropped_mask
+from bone_utils import crop_image
+from image_io import read_image
 
 def main():
     parser = argparse.ArgumentParser(description="Crop an image and its corresponding mask using a buffer.")
@@ -45,8 +22,8 @@ def main():
     args = parser.parse_args()
 
     # Read images
-    image_sitk = sitk.ReadImage(args.image)
-    mask_sitk = sitk.ReadImage(args.mask)
+    image_sitk = read_image(args.image)
+    mask_sitk = read_image(args.mask)
 
     # Crop images
     cropped_image, cropped_mask = crop_image(image_sitk, mask_sitk, buffer=args.buffer)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import SimpleITK as sitk
+import numpy as np
+import pandas as pd
+import hashlib
+import json
+import os
+
+from image_io import file_hash, load_image
+from quantiles import percentiles
+from catalog import parse_image_name
+from instrumentation import traced
+from concurrency import process_pool
+from compartments import COMPARTMENTS, WHOLE_BONE
+
+COLUMNS = ['Visit', 'Participant', 'Bone', 'Side', 'Leg Condition', 'Product', 'Compartment', 'Sigma', 'Threshold',
+           'Mean', 'StdDev', 'Max', 'Min', 'Median', 'P25', 'P75', 'Path']
+
+def image_metadata(image_path):
+    # Extract participant ID, bone, side and visit from the file name
+    fields = parse_image_name(image_path)
+    if fields is None or fields['product'] not in ('common', 'difference', 'difference_gaussian'):
+        raise ValueError(f"File name does not match expected patterns: {image_path}")
+    # Difference images are labelled by both visits, e.g. 'V1_V2'
+    visit_number = fields['visit'] if fields['followup_visit'] is None else f"{fields['visit']}_{fields['followup_visit']}"
+    return {'Visit': visit_number, 'Participant': fields['participant'], 'Bone': fields['bone'], 'Side': fields['side'],
+            'Leg Condition': f"{fields['bone']}_{fields['side']}", 'Product': fields['product'], 'Sigma': fields['sigma']}
+
+def _value_statistics(values):
+    # Median and IQR from a single histogram (integer data) or partition (float data) pass
+    p25, median, p75 = percentiles(values, [25, 50, 75])
+    return {
+        'Mean': float(np.mean(values)),
+        'StdDev': float(np.std(values)),
+        'Max': float(np.max(values)),
+        'Min': float(np.min(values)),
+        'Median': float(median),
+        'P25': float(p25),
+        'P75': float(p75),
+    }
+
+@traced
+def compute_image_statistics(image_path, threshold=1500, compartments_path=None):
+    # Load the image (compressed inputs are unpacked once into the working cache)
+    image = load_image(image_path)
+    # Threshold the image to remove values over the threshold (e.g., surgical screws)
+    image = sitk.Threshold(image, lower=-np.inf, upper=threshold, outsideValue=threshold)
+    image_array = sitk.GetArrayViewFromImage(image)
+
+    # Extract all non-zero values
+    non_zero = image_array != 0
+    non_zero_values = image_array[non_zero]
+    stats = _value_statistics(non_zero_values)
+    if compartments_path is not None:
+        # Each compartment's values are a subset of the whole-bone values, selected by the label map on the same grid
+        labels_image = load_image(compartments_path)
+        labels = sitk.GetArrayViewFromImage(labels_image)
+        if labels.shape != image_array.shape:
+            raise ValueError(f"Compartment label map {compartments_path} is not on the grid of {image_path}")
+        non_zero_labels = labels[non_zero]
+        stats['Compartments'] = {name: _value_statistics(non_zero_values[non_zero_labels == label])
+                                 for label, name in COMPARTMENTS.items() if np.any(non_zero_labels == label)}
+    return stats
+
+def _cache_path(cache_dir, digest, threshold, compartments_digest=None):
+    if compartments_digest is not None:
+        return os.path.join(cache_dir, digest[:2], f"{digest}_{threshold}_{compartments_digest}.json")
+    return os.path.join(cache_dir, digest[:2], f"{digest}_{threshold}.json")
+
+def _read_cached(cache_dir, digest, threshold, compartments_digest=None):
+    fn = _cache_path(cache_dir, digest, threshold, compartments_digest)
+    if os.path.exists(fn):
+        with open(fn) as f:
+            return json.load(f)
+    return None
+
+def cached_image_statistics(image_path, threshold, cache_dir, compartments_path=None, compartments_digest=None):
+    # Worker: statistics keyed by file content, so a renamed or touched but unchanged file is not recomputed
+    stat = os.stat(image_path)
+    digest = file_hash(image_path)
+    stats = _read_cached(cache_dir, digest, threshold, compartments_digest)
+    if stats is None:
+        stats = compute_image_statistics(image_path, threshold, compartments_path)
+        fn = _cache_path(cache_dir, digest, threshold, compartments_digest)
+        os.makedirs(os.path.dirname(fn), exist_ok=True)
+        with open(f"{fn}.{os.getpid()}.tmp", 'w') as f:
+            json.dump(stats, f)
+        os.replace(f"{fn}.{os.getpid()}.tmp", fn)
+    return stats, [stat.st_mtime_ns, stat.st_size, digest]
+
+def _index_path(cache_dir, image_path):
+    # One entry file per image, so processes saving different images never overwrite each other's entries
+    key = hashlib.sha256(os.path.abspath(image_path).encode()).hexdigest()
+    return os.path.join(cache_dir, 'hash_index', key[:2], f"{key}.json")
+
+def _read_index_entry(cache_dir, image_path):
+    fn = _index_path(cache_dir, image_path)
+    if os.path.exists(fn):
+        with open(fn) as f:
+            return json.load(f)
+    return None
+
+def _write_index_entry(cache_dir, image_path, entry):
+    fn = _index_path(cache_dir, image_path)
+    os.makedirs(os.path.dirname(fn), exist_ok=True)
+    with open(f"{fn}.{os.getpid()}.tmp", 'w') as f:
+        json.dump(entry, f)
+    os.replace(f"{fn}.{os.getpid()}.tmp", fn)
+
+def analyze_ct_images(ct_image_paths, output_file=None, threshold=1500, cache_dir='.stats_cache', max_workers=None, compartments=None):
+    """
+    Analyze CT images for a given participant and leg condition.
+
+    Images are processed in parallel worker processes and their statistics are cached on disk, keyed by
+    file content hash and threshold, so a rerun only computes images that are new or have changed.
+
+    Parameters:
+    - ct_image_paths: list of str, paths to the CT images corresponding to different follow-up visits
+    - output_file: str, path to save a CSV copy of the results (optional, use results_store for analysis)
+    - threshold: float, values above this (e.g. surgical screws) are clipped before the statistics
+    - cache_dir: str, directory of the per-image statistics cache
+    - max_workers: int, number of worker processes (default: see concurrency.thread_split; 1 computes in this process)
+    - compartments: dict mapping an image path to the compartment label map on its grid (see compartments.py and
+      catalog.compartment_maps); each compartment of a mapped image gets its own rows next to the whole-bone row,
+      from the same pass over the image (optional)
+
+    Returns:
+    - df: pandas DataFrame containing the computed statistics for each visit (and compartment)
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    # The cache key of compartment statistics includes the label map they were computed with
+    compartments = {image_path: compartments[image_path] for image_path in ct_image_paths
+                    if compartments is not None and compartments.get(image_path) is not None}
+    compartment_digests = {image_path: file_hash(fn) for image_path, fn in compartments.items()}
+
+    # Parse every file name up front so a bad path fails before any image is loaded
+    metadata = {image_path: image_metadata(image_path) for image_path in ct_image_paths}
+
+    # Files whose mtime and size match the hash index are served from the cache without being read
+    results = {}
+    pending = []
+    for image_path in metadata:
+        stat = os.stat(image_path)
+        entry = _read_index_entry(cache_dir, image_path)
+        stats = None
+        if entry is not None and entry[:2] == [stat.st_mtime_ns, stat.st_size]:
+            stats = _read_cached(cache_dir, entry[2], threshold, compartment_digests.get(image_path))
+        if stats is None:
+            pending.append(image_path)
+        else:
+            results[image_path] = stats
+
+    if len(pending) == 1 or (pending and max_workers == 1):
+        # In this process, e.g. when already running inside a scheduler worker
+        for image_path in pending:
+            results[image_path], entry = cached_image_statistics(
+                image_path, threshold, cache_dir, compartments.get(image_path), compartment_digests.get(image_path))
+            _write_index_entry(cache_dir, image_path, entry)
+    elif pending:
+        with process_pool(max_workers) as executor:
+            futures = [executor.submit(cached_image_statistics, image_path, threshold, cache_dir,
+                                       compartments.get(image_path), compartment_digests.get(image_path))
+                       for image_path in pending]
+            for image_path, future in zip(pending, futures):
+                results[image_path], entry = future.result()
+                _write_index_entry(cache_dir, image_path, entry)
+
+    # Collect the rows in a list and build the DataFrame once
+    rows = []
+    for image_path in ct_image_paths:
+        compartments = {WHOLE_BONE: results[image_path], **results[image_path].get('Compartments', {})}
+        for compartment, stats in compartments.items():
+            rows.append({
+                **metadata[image_path],
+                'Compartment': compartment,
+                'Threshold': float(threshold),
+                'Mean': stats['Mean'],
+                'StdDev': stats['StdDev'],
+                'Max': stats['Max'],
+                'Min': stats['Min'],
+                'Median': stats['Median'],
+                'P25': stats['P25'],
+                'P75': stats['P75'],
+                'Path': image_path,
+            })
+    df = pd.DataFrame(rows, columns=COLUMNS)
+
+    # Save the DataFrame to a CSV file
+    if output_file is not None:
+        df.to_csv(output_file, index=False)
+
+    print(f"Analyzed {len(ct_image_paths)} images ({len(pending)} computed, {len(ct_image_paths) - len(pending)} cached)")
+    return df
@@ -8,211 +8,123 @@ Created on Thu Aug 15 17:04:14 2024
 
 import SimpleITK as sitk
 import argparse
-import vtk
 import os
 import numpy as np
-
-def create_reader(fn):
-    if fn.endswith('.nii') or fn.endswith('nii.gz'):
-        reader = vtk.vtkNIFTIImageReader()
-        reader.SetFileName(fn)
-    elif fn.endswith('.dcm'):
-        reader = vtk.vtkDICOMImageReader()
-        reader.SetDirectoryName(os.path.dirname(fn))
-    elif fn.endswith('.obj'):
-        reader = vtk.vtkOBJReader()
-        reader.SetFileName(fn)
-    else:
-        raise ValueError(f"Invalid image filename given (only *.dcm, *.nii, and *.obj supported): {fn}")
-    
-    reader.Update()
-    return reader
-
-V1 = create_reader('/Users/pavlovic/Desktop/SALTACII_0004/Femur_Left/SALTACII_0004_V1_Femur_Left_common.nii.gz')
-V2 = create_reader('/Users/pavlovic/Desktop/SALTACII_0004/Femur_Left/SALTACII_0004_V2_Femur_Left_common.nii.gz')
-V3 = create_reader('/Users/pavlovic/Desktop/SALTACII_0004/Femur_Left/SALTACII_0004_V3_Femur_Left_common.nii.gz')
-V4 = create_reader('/Users/pavlovic/Desktop/SALTACII_0004/Femur_Left/SALTACII_0004_V4_Femur_Left_common.nii.gz')
-VS = create_reader('/Users/pavlovic/Desktop/SALTACII_0004/Femur_Left/SALTACII_0004_VS_Femur_Left_common.nii.gz')
-
-difference_V1_V2 = create_reader('/Users/pavlovic/Desktop/SALTACII_0004/Femur_Left/SALTACII_0004_V1_V2_Femur_Left_difference.nii.gz')
-#difference_V1_V3 = create_reader('/Users/pavlovic/Desktop/SALTACII_0004/Femur_Left/SALTACII_0004_V1_V3_Femur_Left_difference.nii.gz')
-#difference_V1_V4 = create_reader('/Users/pavlovic/Desktop/SALTACII_0004/Femur_Left/SALTACII_0004_V1_V4_Femur_Left_difference.nii.gz')
-#difference_V1_VS = create_reader('/Users/pavlovic/Desktop/SALTACII_0004/Femur_Left/SALTACII_0004_V1_VS_Femur_Left_difference.nii.gz')
-
-mask = create_reader('/Users/pavlovic/Desktop/SALTACII_0004/Femur_Left/SALTACII_0004_V1_Femur_Left_cropped_common_mask.nii.gz')
-
-"""parser = argparse.ArgumentParser(description="Process and save masked images based on labels.")
-
-# Define command-line arguments
-parser.add_argument('main_image_path', type=str, help='Path to the main image')
-parser.add_argument('mask_image_path', type=str, help='Path to the mask image')
-parser.add_argument('--kernel_radius', type=int, nargs='+', default=[1, 1, 1], help='Kernel radius for dilation (e.g., 2 2 2)')
-parser.add_argument('--label_of_interest', type=int, help='Specific label to process (optional)')
-
-# Parse arguments
-args = parser.parse_args()"""
-
-voxel_dimensions = V1.GetOutput().GetSpacing()
-
-# Calculate voxel volume in mm³
-voxel_volume_mm3 = np.prod(voxel_dimensions)
-
-# Convert voxel volume to cm³
-voxel_volume_cm3 = voxel_volume_mm3 / 1000.0
-
-print(voxel_volume_cm3)
-
-# Convert binary segmentation into stencil
-mask_stencil = vtk.vtkImageToImageStencil()
-mask_stencil.SetInputData(V1.GetOutput())
-mask_stencil.ThresholdBetween(1,1)
-mask_stencil.Update()
-
-extract_results = vtk.vtkImageAccumulate()
-extract_results.SetInputData(V1.GetOutput())
-
-# Set foreground stencil
-extract_results.SetStencilData(mask_stencil.GetOutput())
-extract_results.Update()
-
-mean_results = extract_results.GetMean()
-sd_results = extract_results.GetStandardDeviation()
-max_results = extract_results.GetMax()
-min_results = extract_results.GetMin()
-voxel_count_results = extract_results.GetVoxelCount()
-
-print("Mean: ", mean_results[0])
-print("Standard Deviation: ", sd_results[0])
-print("Maximum: ", max_results[0])
-print("Minimum: ", min_results[0])
-print("Voxel Count: ", voxel_count_results)
-
-extract_results = vtk.vtkImageAccumulate()
-extract_results.SetInputData(V2.GetOutput())
-
-# Set foreground stencil
-extract_results.SetStencilData(mask_stencil.GetOutput())
-extract_results.Update()
-
-mean_results = extract_results.GetMean()
-sd_results = extract_results.GetStandardDeviation()
-max_results = extract_results.GetMax()
-min_results = extract_results.GetMin()
-voxel_count_results = extract_results.GetVoxelCount()
-
-print("Mean: ", mean_results[0])
-print("Standard Deviation: ", sd_results[0])
-print("Maximum: ", max_results[0])
-print("Minimum: ", min_results[0])
-print("Voxel Count: ", voxel_count_results)
-
-extract_results = vtk.vtkImageAccumulate()
-extract_results.SetInputData(difference_V1_V2.GetOutput())
-
-# Set foreground stencil
-extract_results.SetStencilData(mask_stencil.GetOutput())
-extract_results.Update()
-
-mean_results = extract_results.GetMean()
-sd_results = extract_results.GetStandardDeviation()
-max_results = extract_results.GetMax()
-min_results = extract_results.GetMin()
-voxel_count_results = extract_results.GetVoxelCount()
-
-print("Mean: ", mean_results[0])
-print("Standard Deviation: ", sd_results[0])
-print("Maximum: ", max_results[0])
-print("Minimum: ", min_results[0])
-print("Voxel Count: ", voxel_count_results)
-
-# Read images
-V1 = sitk.ReadImage('/Users/pavlovic/Desktop/SALTACII_0004/Femur_Left/SALTACII_0004_V1_Femur_Left_common.nii.gz')
-VS = sitk.ReadImage('/Users/pavlovic/Desktop/SALTACII_0004/Femur_Left/SALTACII_0004_VS_Femur_Left_common.nii.gz')
-V2 = sitk.ReadImage('/Users/pavlovic/Desktop/SALTACII_0004/Femur_Left/SALTACII_0004_V2_Femur_Left_common.nii.gz')
-V3 = sitk.ReadImage('/Users/pavlovic/Desktop/SALTACII_0004/Femur_Left/SALTACII_0004_V3_Femur_Left_common.nii.gz')
-V4 = sitk.ReadImage('/Users/pavlovic/Desktop/SALTACII_0004/Femur_Left/SALTACII_0004_V4_Femur_Left_common.nii.gz')
-
-difference_V1_V2 = sitk.ReadImage('/Users/pavlovic/Desktop/SALTACII_0004/Femur_Left/SALTACII_0004_V1_V2_Femur_Left_difference.nii.gz')
-
-columns = ['Visit', 'Mean', 'StdDev', 'Max', 'Min', 'Median', 'IQR']
-df = pd.DataFrame(columns=columns)
-
-V1_array = sitk.GetArrayFromImage(V1)
-
-# Extract all non-zero values
-V1_non_zero_values = V1_array[V1_array != 0]
-V1_mean_non_zero = np.mean(V1_non_zero_values)
-V1_median_non_zero = np.median(V1_non_zero_values)
-V1_std_non_zero = np.std(V1_non_zero_values)
-V1_max_non_zero = np.max(V1_non_zero_values)
-V1_min_non_zero = np.min(V1_non_zero_values)
-V1_25p_non_zero = np.percentile(V1_non_zero_values, 25)
-V1_75p_non_zero = np.percentile(V1_non_zero_values, 75)
-
-dict = {'mean': V1_mean_non_zero, VS_mean_non_zero, V2_mean_non_zero,V3_mean_non_zero, V4_mean_non_zero}
-
-# Adding a new row using loc
-#df.loc[len(df)] = ['David', 40, 'San Francisco']
-
-V2_array = sitk.GetArrayFromImage(V2)
-V2_array[V2_array ==0] =np.nan
-
-diff_array = sitk.GetArrayFromImage(difference_V1_V2)
-diff_array[diff_array ==0] =np.nan
-
-voxel_count = np.count_nonzero(V1_array)
-
-BMD_total = V1_array.sum()  
-BMD_AVG = BMD_total / voxel_count  # [mg/cc K2HPO4]# [mg/cc K2HPO4]
-
-masked_V1 = np.nonzero(V1_array)
-V1_array[V1_array ==0] =np.nan
-
-print("Baseline Mean: ", np.nanmean(V1_array))
-print("Baseline Standard Deviation: ", np.nanstd(V1_array))
-print("Baseline Maximum: ", np.nanmax(V1_array))
-print("Baseline Minimum: ", np.nanmin(V1_array))
-print("Baseline 25th percentile: ", np.nanpercentile(V1_array, 25))
-print("Baseline 75th percentile: ", np.nanpercentile(V1_array, 75))
-print("Baseline Median: ", np.nanmedian(V1_array))  
-
-print("Followup Mean: ", np.nanmean(V2_array))
-print("Followup Standard Deviation: ", np.nanstd(V2_array))
-print("Followup Maximum: ", np.nanmax(V2_array))
-print("Followup Minimum: ", np.nanmin(V2_array))
-print("Followup 25th percentile: ", np.nanpercentile(V2_array, 25))
-print("Followup 75th percentile: ", np.nanpercentile(V2_array, 75))
-print("Followup Median: ", np.nanmedian(V2_array))
-
-print("Diff Mean: ", np.nanmean(diff_array))
-print("Diff Standard Deviation: ", np.nanstd(diff_array))
-print("Diff Maximum: ", np.nanmax(diff_array))
-print("Diff Minimum: ", np.nanmin(diff_array))
-print("Diff 25th percentile: ", np.nanpercentile(diff_array, 25))
-print("Diff 75th percentile: ", np.nanpercentile(diff_array, 75))
-print("Diff Median: ", np.nanmedian(diff_array))
-
-# Create a binary mask where non-zero pixels are set to 1, and zero pixels are set to 0
-binary_mask = sitk.Cast(V1 != 0, sitk.sitkUInt8)
-
-# Apply the binary mask to remove zero values from the image
-masked_V1 = sitk.Mask(V1, binary_mask)
-
-stats = sitk.StatisticsImageFilter()
-stats.Execute(masked_V1)
-
-# Retrieve the statistics
-min_intensity = stats.GetMinimum()
-max_intensity = stats.GetMaximum()
-mean_intensity = stats.GetMean()
-std_dev_intensity = stats.GetSigma()  # This returns the standard deviation
-variance = stats.GetVariance()
-sum_intensity = stats.GetSum()
-
-# Print the results
-print(f"Minimum Intensity: {min_intensity}")
-print(f"Maximum Intensity: {max_intensity}")
-print(f"Mean Intensity: {mean_intensity}")
-print(f"Standard Deviation: {std_dev_intensity}")
-print(f"Variance: {variance}")
-print(f"Sum of Intensities: {sum_intensity}")
+import pandas as pd
+
+from image_io import read_image, image_to_array
+from quantiles import percentiles as compute_percentiles
+from instrumentation import traced
+
+def as_array(image):
+    if isinstance(image, sitk.Image):
+        return image_to_array(image)
+    return np.asarray(image)
+
+def voxel_volume_cm3(image):
+    # Voxel volume in mm³ converted to cm³
+    return np.prod(image.GetSpacing()) / 1000.0
+
+def check_same_grid(mask, image, name):
+    # Masked voxels are gathered by flat index, so every image must share the mask's grid exactly
+    mask_shape, image_shape = as_array(mask).shape, as_array(image).shape
+    if image_shape != mask_shape:
+        raise ValueError(f"Image {name} has size {image_shape[::-1]}, the mask has {mask_shape[::-1]}")
+    if isinstance(mask, sitk.Image) and isinstance(image, sitk.Image):
+        for attribute in ('Spacing', 'Origin', 'Direction'):
+            if not np.allclose(getattr(image, f'Get{attribute}')(), getattr(mask, f'Get{attribute}')(), atol=1e-4):
+                raise ValueError(f"Image {name} is not on the grid of the mask ({attribute.lower()} differs)")
+
+def stack_masked_values(mask, images, names=None):
+    # Gather the voxels under the mask from every image into one (N images, N voxels) array
+    if names is None:
+        names = list(range(len(images)))
+    for image, name in zip(images, names):
+        check_same_grid(mask, image, name)
+    index = np.flatnonzero(as_array(mask))
+    arrays = [as_array(image).ravel() for image in images]
+    stack = np.empty((len(arrays), index.size), dtype=np.result_type(*arrays))
+    for row, array in zip(stack, arrays):
+        np.take(array, index, out=row)
+    return stack
+
+@traced
+def masked_statistics(mask, images, names=None, percentiles=(25, 50, 75), voxel_volume=None, resolution=None):
+    """
+    Compute descriptive statistics of several co-registered images under one mask in a single pass.
+
+    Parameters:
+    - mask: sitk.Image or array, voxels != 0 are included
+    - images: list of sitk.Image or arrays with the same size as the mask (e.g. V1, VS, V2, V3, V4, differences)
+    - names: list of str, row labels for the images (default: 0..N-1)
+    - percentiles: sequence of float, percentiles reported for every image
+    - voxel_volume: float, voxel volume in cm³ used for the BMC (default: taken from the mask spacing)
+    - resolution: float, precision of float-valued images for exact histogram percentiles (optional)
+
+    Returns:
+    - df: pandas DataFrame with one row of statistics per image (NaN statistics and a Count of 0 if the mask
+      is empty, e.g. for a bone whose common region collapsed)
+    """
+    if names is None:
+        names = list(range(len(images)))
+    if voxel_volume is None and isinstance(mask, sitk.Image):
+        voxel_volume = voxel_volume_cm3(mask)
+
+    stack = stack_masked_values(mask, images, names)
+    count = stack.shape[1]
+    if count == 0:
+        # Nothing to reduce: the rows are kept so a collapsed bone shows up in the results instead of failing them
+        nan = np.full(len(images), np.nan)
+        df = pd.DataFrame({'Image': names, 'Count': 0, 'Mean': nan, 'StdDev': nan, 'Max': nan, 'Min': nan, 'Sum': 0.0})
+        for q in percentiles:
+            df['Median' if q == 50 else f'P{q:g}'] = nan
+        if voxel_volume is not None:
+            df['BMC'] = 0.0
+        return df
+
+    # All moments and extrema are reduced along the voxel axis for every image at once
+    total = stack.sum(axis=1, dtype=np.float64)
+    mean = total / count
+    std = np.sqrt(np.var(stack, axis=1, dtype=np.float64))
+    # One counting (integer data) or partitioning (float data) pass per image covers every percentile
+    quantiles = np.stack([compute_percentiles(row, percentiles, resolution=resolution) for row in stack], axis=1)
+
+    df = pd.DataFrame({
+        'Image': names,
+        'Count': count,
+        'Mean': mean,
+        'StdDev': std,
+        'Max': stack.max(axis=1),
+        'Min': stack.min(axis=1),
+        'Sum': total,
+    })
+    for q, values in zip(percentiles, quantiles):
+        df['Median' if q == 50 else f'P{q:g}'] = values
+    if voxel_volume is not None:
+        # Bone mineral content [mg]: density [mg/cc] summed over the mask times the voxel volume [cc]
+        df['BMC'] = total * voxel_volume
+    return df
+
+def main():
+    parser = argparse.ArgumentParser(description="Descriptive statistics of co-registered images under a common mask.")
+    parser.add_argument('mask_path', type=str, help='Path to the mask image (e.g. *_cropped_common_mask.nii.gz)')
+    parser.add_argument('image_paths', type=str, nargs='+', help='Paths to the co-registered images (e.g. *_common.nii.gz, *_difference.nii.gz)')
+    parser.add_argument('--names', type=str, nargs='+', help='Labels for the images (default: file names)')
+    parser.add_argument('--percentiles', type=float, nargs='+', default=[25, 50, 75], help='Percentiles to report (default: 25 50 75)')
+    parser.add_argument('--resolution', type=float, help='Precision of float images for exact histogram percentiles (e.g. 0.1)')
+    parser.add_argument('--output', type=str, help='Path to save the statistics as CSV')
+    args = parser.parse_args()
+
+    mask = read_image(args.mask_path)
+    images = [read_image(fn) for fn in args.image_paths]
+    names = args.names if args.names is not None else [os.path.basename(fn).replace('.nii.gz', '') for fn in args.image_paths]
+
+    df = masked_statistics(mask, images, names=names, percentiles=args.percentiles, resolution=args.resolution)
+    print(df.to_string(index=False))
+
+    if args.output is not None:
+        df.to_csv(args.output, index=False)
+        print(f"Statistics saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,14 @@
 import SimpleITK as sitk
-import pandas as pd
 import os
 import argparse
 
+from bone_utils import LABELS_PATH, load_labels, label_mask
+from image_io import read_image
+
 # Function to process each label
 def process_label(label, description, main_image, mask_image, kernel_radius, output_subdir, base_name):
-    # Create binary mask for the current label
-    binary_mask = sitk.Equal(mask_image, label)
-
-    # Dilate the binary mask
-    dilated_mask = sitk.BinaryDilate(binary_mask, kernel_radius)
+    # Create the dilated binary mask for the current label
+    dilated_mask = label_mask(mask_image, label, kernel_radius)
     output_filename_mask = os.path.join(output_subdir, f"{base_name}_{description}_mask.nii.gz")
     sitk.WriteImage(dilated_mask, output_filename_mask)
     
@@ -24,30 +23,21 @@ def process_label(label, description, main_image, mask_image, kernel_radius, out
 
 def main(args):
     # Read the main image and the mask image
-    main_image = sitk.ReadImage(args.main_image_path)
-    mask_image = sitk.ReadImage(args.mask_image_path)
+    main_image = read_image(args.main_image_path)
+    mask_image = read_image(args.mask_image_path)
 
     # Create a minimal kernel radius for each dimension
     kernel_radius = [int(r) for r in args.kernel_radius]
 
-    # Hardcoded path to the CSV file containing labels and descriptions
-    labels_csv_path = '/Users/pavlovic/Desktop/Analysis/SALTACII_CT/ML_labels.csv'
-
-    # Read the DataFrame containing labels and descriptions
-    labels_list = pd.read_csv(labels_csv_path)
+    # Labels and descriptions (ML_labels.csv next to the scripts unless --labels_csv is given)
+    labels_list = load_labels(args.labels_csv, args.label_of_interest)
     
     # Extract the directory and base name from the main image path
     output_directory = os.path.dirname(args.main_image_path)
     main_image_base_name = os.path.basename(args.main_image_path).replace('_CAL.nii.gz', '')  # Remove the file extension
     
-    # Filter labels based on the label of interest, if provided
-    if args.label_of_interest is not None:
-        labels_list = labels_list[labels_list['IND'] == args.label_of_interest]
-
-    # Process each row in the DataFrame
-    for index, row in labels_list.iterrows():
-        label = row['IND']
-        description = row['LABEL'].replace(" ", "_")  # Replace spaces with underscores for filenames
+    # Process each label
+    for label, description in labels_list:
         # Define the subdirectory for outputs
         output_subdir = os.path.join(output_directory, f"{description}")
         
@@ -66,6 +56,7 @@ if __name__ == "__main__":
     parser.add_argument('mask_image_path', type=str, help='Path to the mask image')
     parser.add_argument('--kernel_radius', type=int, nargs='+', default=[1, 1, 1], help='Kernel radius for dilation (e.g., 2 2 2)')
     parser.add_argument('--label_of_interest', type=int, help='Specific label to process (optional)')
+    parser.add_argument('--labels_csv', type=str, default=LABELS_PATH, help='CSV of labels and descriptions (default: ML_labels.csv)')
 
     # Parse arguments
     args = parser.parse_args()
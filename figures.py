@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pandas as pd
+import hashlib
+import json
+import os
+
+from instrumentation import traced
+from concurrency import process_pool
+
+MANIFEST_FILENAME = 'figures_manifest.json'
+
+def _pyplot():
+    # Non-interactive backend so figures render on headless servers and in worker processes
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+def spaghetti_plot(data, bone, metric, fn):
+    import seaborn as sns
+    plt = _pyplot()
+    # Plot spaghetti plots for each subject and leg
+    fig = plt.figure(figsize=(10, 6))
+    sns.lineplot(data=data, x='Visit', y=metric, hue='Participant', style='Leg Condition', markers=True, dashes=True)
+    plt.title(f'Spaghetti Plot of {metric} {bone} Density Over Time')
+    plt.xlabel('Visit')
+    plt.ylabel('Bone Density')
+    plt.legend(loc='upper right')
+    plt.grid(True)
+    fig.savefig(fn)
+    plt.close(fig)
+
+def heatmap_plot(data, bone, metric, fn):
+    import seaborn as sns
+    plt = _pyplot()
+    # Pivot the data for heatmap
+    heatmap_data = data.pivot_table(index='Visit', columns='Leg Condition', values=metric, aggfunc='mean')
+    fig = plt.figure(figsize=(8, 6))
+    sns.heatmap(heatmap_data, annot=True, cmap='coolwarm', fmt=".1f", linewidths=.5)
+    plt.title(f'Heatmap of {metric} {bone} Density Over Time')
+    plt.xlabel('Leg')
+    plt.ylabel('Visit')
+    fig.savefig(fn)
+    plt.close(fig)
+
+PLOTS = {
+    'spaghetti': spaghetti_plot,
+    'heatmap': heatmap_plot,
+}
+
+def data_digest(kind, bone, metric, data):
+    # Content hash of exactly the data a figure is drawn from
+    digest = hashlib.sha256(f"{kind}_{bone}_{metric}".encode())
+    digest.update(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+    digest.update(','.join(data.columns).encode())
+    return digest.hexdigest()
+
+@traced
+def render(kind, data, bone, metric, fn):
+    PLOTS[kind](data, bone, metric, fn)
+    return fn
+
+def render_figures(results, output_dir, metrics=('Mean', 'Median'), kinds=('spaghetti', 'heatmap'), max_workers=None):
+    """
+    Render every figure for every bone and metric to PNG files in parallel worker processes.
+
+    Figures whose underlying data has not changed since the last run (tracked by content hash in
+    figures_manifest.json) are skipped.
+
+    Parameters:
+    - results: pandas DataFrame with Bone, Participant, Visit, Leg Condition and metric columns
+    - output_dir: str, directory of the figures
+    - metrics: sequence of str, metric columns to plot
+    - kinds: sequence of str, figure types (see PLOTS)
+    - max_workers: int, number of worker processes (default: number of CPUs)
+
+    Returns:
+    - list of str, paths of the figures that were (re)rendered
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_FILENAME)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    jobs = []
+    for bone, bone_data in results.groupby('Bone', sort=True):
+        for metric in metrics:
+            data = bone_data[['Participant', 'Visit', 'Leg Condition', metric]].sort_values(['Participant', 'Leg Condition', 'Visit'], ignore_index=True)
+            for kind in kinds:
+                fn = os.path.join(output_dir, f"{bone}_{metric}_{kind}.png")
+                digest = data_digest(kind, bone, metric, data)
+                if manifest.get(os.path.basename(fn)) == digest and os.path.exists(fn):
+                    continue
+                jobs.append((kind, data, bone, metric, fn, digest))
+
+    if jobs:
+        with process_pool(max_workers, itk=False) as executor:
+            futures = [executor.submit(render, kind, data, bone, metric, fn) for kind, data, bone, metric, fn, _ in jobs]
+            for (_, _, _, _, fn, digest), future in zip(jobs, futures):
+                future.result()
+                manifest[os.path.basename(fn)] = digest
+        with open(f"{manifest_path}.tmp", 'w') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+
+    print(f"Rendered {len(jobs)} figures to {output_dir}")
+    return [job[4] for job in jobs]
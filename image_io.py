@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import SimpleITK as sitk
+import numpy as np
+from collections import OrderedDict
+import hashlib
+import json
+import os
+
+import instrumentation  # noqa: F401, traces SimpleITK calls when SALTACII_TRACE is set
+
+# Upper bound on the decoded volumes kept in memory (MB), overridable from the environment
+DEFAULT_CACHE_MB = int(os.environ.get('SALTACII_IMAGE_CACHE_MB', 4096))
+
+# Working cache of decompressed inputs on disk: off unless SALTACII_WORKING_CACHE names its directory
+# (e.g. a scratch folder next to the study root); its size is bounded by SALTACII_WORKING_CACHE_MB
+WORKING_CACHE_DIR = os.environ.get('SALTACII_WORKING_CACHE') or None
+WORKING_CACHE_MB = int(os.environ.get('SALTACII_WORKING_CACHE_MB', 20480))
+
+# vtk is only imported by the functions that build VTK objects, so statistics entry points don't pay for it
+
+def create_reader(fn):
+    import vtk
+    if fn.endswith('.nii') or fn.endswith('nii.gz'):
+        reader = vtk.vtkNIFTIImageReader()
+        reader.SetFileName(fn)
+    elif fn.endswith('.dcm'):
+        reader = vtk.vtkDICOMImageReader()
+        reader.SetDirectoryName(os.path.dirname(fn))
+    elif fn.endswith('.obj'):
+        reader = vtk.vtkOBJReader()
+        reader.SetFileName(fn)
+    else:
+        raise ValueError(f"Invalid image filename given (only *.dcm, *.nii, and *.obj supported): {fn}")
+
+    reader.Update()
+    return reader
+
+_file_hashes = {}
+
+def file_hash(fn, chunk_size=1 << 20):
+    # Hash the file contents, remembering the result for as long as the file is unchanged
+    stat = os.stat(fn)
+    key = (os.path.abspath(fn), stat.st_mtime_ns, stat.st_size)
+    if key not in _file_hashes:
+        digest = hashlib.sha256()
+        with open(fn, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        _file_hashes[key] = digest.hexdigest()
+    return _file_hashes[key]
+
+def image_nbytes(image):
+    return image.GetNumberOfPixels() * image.GetNumberOfComponentsPerPixel() * image.GetSizeOfPixelComponent()
+
+class WorkingCache:
+    """
+    Compressed images unpacked once into uncompressed .npy files named by the content hash of the source,
+    with the geometry and the header metadata dictionary alongside, so a cached read is equivalent to
+    sitk.ReadImage. Later reads, from any process, memory-map the .npy file instead of
+    decompressing again, so a repeated read is served from the page cache.
+
+    Entries are marked as used by touching them, and the least recently used are deleted when the
+    directory grows beyond max_mb. A deleted entry stays readable for processes that have it mapped.
+    """
+    def __init__(self, root=WORKING_CACHE_DIR, max_mb=WORKING_CACHE_MB):
+        self.root = root
+        self.max_bytes = max_mb * 1024 * 1024
+
+    @property
+    def enabled(self):
+        # A cache without a directory (the default) or without room reads every file directly
+        return self.root is not None and self.max_bytes > 0
+
+    def _paths(self, fn):
+        digest = file_hash(fn)
+        return os.path.join(self.root, f"{digest}.npy"), os.path.join(self.root, f"{digest}.json")
+
+    def _unpack(self, fn, array_fn, info_fn):
+        image = sitk.ReadImage(fn)
+        info = {'spacing': image.GetSpacing(), 'origin': image.GetOrigin(), 'direction': image.GetDirection(),
+                'vector': image.GetNumberOfComponentsPerPixel() > 1,
+                'metadata': {key: image.GetMetaData(key) for key in image.GetMetaDataKeys()}}
+        os.makedirs(self.root, exist_ok=True)
+        # Temporary files are per process, so concurrent workers unpacking the same input don't clash
+        tmp = f"{array_fn}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            np.save(f, sitk.GetArrayViewFromImage(image))
+        with open(f"{info_fn}.{os.getpid()}.tmp", 'w') as f:
+            json.dump(info, f)
+        os.replace(f"{info_fn}.{os.getpid()}.tmp", info_fn)
+        os.replace(tmp, array_fn)
+        self.evict(keep=array_fn)
+
+    def array(self, fn):
+        """
+        Read-only memory-mapped array (z, y, x) of an image and its geometry.
+
+        Returns:
+        - array: numpy.memmap backed by the unpacked file
+        - info: dict with spacing, origin, direction, whether the pixels are vectors and the metadata dictionary
+        """
+        array_fn, info_fn = self._paths(fn)
+        try:
+            with open(info_fn) as f:
+                info = json.load(f)
+            # Entries unpacked before the metadata was stored are unpacked again
+            if 'metadata' not in info:
+                raise ValueError(f"No metadata in {info_fn}")
+            array = np.load(array_fn, mmap_mode='r')
+            os.utime(array_fn)
+        except (OSError, ValueError):
+            self._unpack(fn, array_fn, info_fn)
+            with open(info_fn) as f:
+                info = json.load(f)
+            array = np.load(array_fn, mmap_mode='r')
+        return array, info
+
+    def image(self, fn):
+        # SimpleITK images own their buffer, so this copies the mapped pixels once (no decompression)
+        array, info = self.array(fn)
+        image = sitk.GetImageFromArray(array, isVector=info['vector'])
+        image.SetSpacing(info['spacing'])
+        image.SetOrigin(info['origin'])
+        image.SetDirection(info['direction'])
+        for key, value in info['metadata'].items():
+            image.SetMetaData(key, value)
+        return image
+
+    def evict(self, keep=None):
+        # Delete the least recently used entries until the cache fits in max_bytes. Other workers evict
+        # concurrently, so entries that vanish while being listed or deleted are skipped.
+        entries = []
+        try:
+            for entry in os.scandir(self.root):
+                if entry.name.endswith('.npy'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            return
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            for fn in (path, path[:-len('.npy')] + '.json'):
+                try:
+                    os.remove(fn)
+                except FileNotFoundError:
+                    pass
+            total -= size
+
+def _compressed(fn):
+    return fn.endswith('.gz')
+
+_working = WorkingCache()
+
+def load_image(fn):
+    # Decode an image without keeping it in memory: compressed files go through the working cache
+    if _working.enabled and _compressed(fn):
+        return _working.image(fn)
+    return sitk.ReadImage(fn)
+
+class ImageCache:
+    """
+    Least-recently-used cache of decoded images, bounded by the total size of the pixel buffers.
+    Entries are keyed by the absolute path, modification time and size of the file, so an image
+    that is rewritten on disk is decoded again on the next read. Cached images are shared, so
+    callers must not modify them in place.
+    """
+    def __init__(self, max_mb=DEFAULT_CACHE_MB):
+        self.max_bytes = max_mb * 1024 * 1024
+        self.nbytes = 0
+        self._images = OrderedDict()
+
+    def _key(self, fn):
+        stat = os.stat(fn)
+        return (os.path.abspath(fn), stat.st_mtime_ns, stat.st_size)
+
+    def get(self, fn):
+        key = self._key(fn)
+        if key in self._images:
+            self._images.move_to_end(key)
+            return self._images[key]
+
+        image = load_image(fn)
+        self._insert(key, image)
+        return image
+
+    def _insert(self, key, image):
+        size = image_nbytes(image)
+        # Images larger than the whole budget are returned without being cached
+        if size <= self.max_bytes:
+            if key in self._images:
+                self.nbytes -= image_nbytes(self._images.pop(key))
+            self._images[key] = image
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._images.popitem(last=False)
+                self.nbytes -= image_nbytes(evicted)
+
+    def peek(self, fn):
+        # Cached image for fn, or None without reading the file
+        return self._images.get(self._key(fn))
+
+    def put(self, fn, image):
+        # Register an image that was just written to fn, so reading it back does not decode the file
+        self._insert(self._key(fn), image)
+
+    def clear(self):
+        self._images.clear()
+        self.nbytes = 0
+
+_cache = ImageCache()
+
+def read_image(fn):
+    # Decode each file at most once per process while it fits in the cache
+    return _cache.get(fn)
+
+def write_image(image, fn):
+    # Write an image and keep it in the cache, so later stages in the same process read it from memory
+    sitk.WriteImage(image, fn)
+    _cache.put(fn, image)
+
+def image_to_array(image):
+    # Read-only NumPy view (z, y, x) of the image buffer, no copy is made
+    return sitk.GetArrayViewFromImage(image)
+
+def read_array(fn):
+    # Read-only array (z, y, x): a view of the in-memory image if cached, else mapped from the working cache
+    image = _cache.peek(fn)
+    if image is None and _working.enabled and _compressed(fn):
+        return _working.array(fn)[0]
+    return image_to_array(image if image is not None else read_image(fn))
+
+def sitk_to_vtk(image):
+    """
+    Wrap a SimpleITK image as vtkImageData without copying the pixel buffer.
+
+    Parameters:
+    - image: sitk.Image, image to wrap; it is kept alive for as long as the VTK scalars are
+
+    Returns:
+    - image_data: vtkImageData sharing memory with the SimpleITK image
+    """
+    import vtk
+    from vtk.util import numpy_support
+    array = image_to_array(image)
+    n_components = image.GetNumberOfComponentsPerPixel()
+    # SimpleITK stores x fastest, which is the point ordering VTK expects
+    scalars = numpy_support.numpy_to_vtk(array.reshape(-1, n_components) if n_components > 1 else array.ravel(), deep=False)
+    scalars._sitk_image = image
+
+    image_data = vtk.vtkImageData()
+    image_data.SetDimensions(image.GetSize())
+    image_data.SetSpacing(image.GetSpacing())
+    image_data.SetOrigin(image.GetOrigin())
+    image_data.SetDirectionMatrix(image.GetDirection())
+    image_data.GetPointData().SetScalars(scalars)
+    return image_data
+
+def vtk_to_array(image_data):
+    # NumPy view (z, y, x) of the vtkImageData scalars, no copy is made
+    from vtk.util import numpy_support
+    nx, ny, nz = image_data.GetDimensions()
+    scalars = image_data.GetPointData().GetScalars()
+    array = numpy_support.vtk_to_numpy(scalars)
+    if scalars.GetNumberOfComponents() > 1:
+        return array.reshape(nz, ny, nx, scalars.GetNumberOfComponents())
+    return array.reshape(nz, ny, nx)
+
+def vtk_to_sitk(image_data):
+    # SimpleITK owns its buffer, so this direction necessarily copies the pixels once
+    array = vtk_to_array(image_data)
+    image = sitk.GetImageFromArray(array, isVector=array.ndim == 4)
+    image.SetSpacing(image_data.GetSpacing())
+    image.SetOrigin(image_data.GetOrigin())
+    direction = image_data.GetDirectionMatrix()
+    image.SetDirection([direction.GetElement(i, j) for i in range(3) for j in range(3)])
+    return image
+
+def array_to_image(array, reference=None):
+    # Copy a NumPy array into a new image, taking the geometry from a reference image if given
+    image = sitk.GetImageFromArray(np.ascontiguousarray(array))
+    if reference is not None:
+        image.CopyInformation(reference)
+    return image
+
+def read_vtk_image(fn):
+    # vtkImageData view of a cached image, so VTK and SimpleITK share one decoded volume
+    return sitk_to_vtk(read_image(fn))
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import contextlib
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from collections import defaultdict
+
+# Set SALTACII_TRACE to a file path to record a trace; when it is unset every hook below is a no-op
+TRACE_ENV = 'SALTACII_TRACE'
+TRACE_PATH = os.environ.get(TRACE_ENV)
+ENABLED = bool(TRACE_PATH)
+
+# SimpleITK reads, writes, conversions and filters used by the pipeline stages
+SITK_FUNCTIONS = [
+    'ReadImage', 'WriteImage', 'GetArrayFromImage', 'GetArrayViewFromImage', 'GetImageFromArray',
+    'Equal', 'BinaryDilate', 'Mask', 'Threshold', 'Subtract', 'Cast', 'CheckerBoard', 'Resample',
+    'SmoothingRecursiveGaussian', 'SignedMaurerDistanceMap', 'BinaryThreshold',
+]
+SITK_FILTERS = ['RegionOfInterestImageFilter', 'SmoothingRecursiveGaussianImageFilter', 'ImageRegistrationMethod']
+
+_NULL = contextlib.nullcontext()
+_fd = None
+_lock = threading.Lock()
+_patched = False
+_own_read = 0
+_own_written = 0
+
+def _read_proc(name):
+    # Reads of /proc and writes to the trace file are the tracer's own I/O and are subtracted below
+    global _own_read
+    with open(f"/proc/self/{name}", 'rb') as f:
+        data = f.read()
+    _own_read += len(data)
+    return data
+
+def _io_bytes():
+    # Bytes passed through read/write system calls (including page-cache hits); Linux only
+    try:
+        rchar, wchar = _own_read, _own_written
+        fields = dict(line.split(b':') for line in _read_proc('io').splitlines())
+        return int(fields[b'rchar']) - rchar, int(fields[b'wchar']) - wchar
+    except OSError:
+        return 0, 0
+
+def _rss_mb():
+    # Current and peak resident set size; ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak = maxrss / (1024 * 1024) if sys.platform == 'darwin' else maxrss / 1024
+    try:
+        current = int(_read_proc('statm').split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except OSError:
+        current = peak
+    return current, peak
+
+def _write(fd, data):
+    global _own_written
+    os.write(fd, data)
+    _own_written += len(data)
+
+def _emit(event):
+    # Events are appended as a JSON array without its closing bracket, which trace viewers
+    # (chrome://tracing, Perfetto) accept; every process appends to the same file
+    global _fd
+    with _lock:
+        if _fd is None or _fd[0] != os.getpid():
+            fd = os.open(TRACE_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            if os.fstat(fd).st_size == 0:
+                _write(fd, b'[\n')
+            _fd = (os.getpid(), fd)
+            name = os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else 'python'
+            _write(fd, (json.dumps({'name': 'process_name', 'ph': 'M', 'pid': os.getpid(), 'args': {'name': f"{name} ({os.getpid()})"}}) + ',\n').encode())
+        _write(_fd[1], (json.dumps(event) + ',\n').encode())
+
+class _Span:
+    __slots__ = ('name', 'category', 'args', 'start')
+
+    def __init__(self, name, category, args):
+        self.name, self.category, self.args = name, category, args
+
+    def __enter__(self):
+        self.start = (time.perf_counter_ns(), time.process_time_ns(), _io_bytes(), _rss_mb()[0])
+        return self
+
+    def __exit__(self, *exc):
+        wall, cpu, (read, written), rss = self.start
+        end_read, end_written = _io_bytes()
+        end_rss, peak_rss = _rss_mb()
+        _emit({
+            'name': self.name, 'cat': self.category, 'ph': 'X',
+            'ts': wall / 1000, 'dur': (time.perf_counter_ns() - wall) / 1000,
+            'pid': os.getpid(), 'tid': threading.get_native_id(),
+            'args': {**self.args, 'cpu_ms': (time.process_time_ns() - cpu) / 1e6,
+                     'read_bytes': end_read - read, 'write_bytes': end_written - written,
+                     'rss_mb': round(end_rss, 1), 'rss_delta_mb': round(end_rss - rss, 1), 'peak_rss_mb': round(peak_rss, 1)},
+        })
+        return False
+
+def span(name, category='stage', **args):
+    """
+    Context manager recording wall time, CPU time, I/O bytes and memory of a block as one trace event.
+
+    Returns a shared no-op context when tracing is off, so it can stay in hot code.
+    """
+    if not ENABLED:
+        return _NULL
+    return _Span(name, category, args)
+
+def traced(function=None, *, name=None, category='function'):
+    # Decorator form of span; when tracing is off at import time the function is returned unchanged
+    def decorate(function):
+        if not ENABLED:
+            return function
+        label = name or f"{function.__module__}.{function.__qualname__}"
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with _Span(label, category, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate(function) if function is not None else decorate
+
+def _describe(name, args, result):
+    # File names and buffer sizes of reads and writes, shown next to the event in the viewer
+    info = {}
+    for value in args[:2]:
+        if isinstance(value, str):
+            info['file'] = value
+            if os.path.exists(value):
+                info['file_bytes'] = os.path.getsize(value)
+    image = result if name != 'WriteImage' else args[0] if args else None
+    if hasattr(image, 'GetNumberOfPixels'):
+        info['image_bytes'] = image.GetNumberOfPixels() * image.GetNumberOfComponentsPerPixel() * image.GetSizeOfPixelComponent()
+    return info
+
+def _wrap_sitk(name, function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with _Span(f"sitk.{name}", 'sitk', {}) as s:
+            result = function(*args, **kwargs)
+            s.args = _describe(name, args, result)
+        return result
+    return wrapper
+
+def instrument_sitk():
+    # Wrap the SimpleITK functions and filter Execute methods the stages call; they are looked up as
+    # sitk.<name> at call time, so patching the module covers every script
+    global _patched
+    if _patched:
+        return
+    import SimpleITK as sitk
+    for name in SITK_FUNCTIONS:
+        if hasattr(sitk, name):
+            setattr(sitk, name, _wrap_sitk(name, getattr(sitk, name)))
+    for name in SITK_FILTERS:
+        cls = getattr(sitk, name, None)
+        if cls is not None:
+            cls.Execute = _wrap_sitk(f"{name}.Execute", cls.Execute)
+    _patched = True
+
+def enable(path):
+    """
+    Turn tracing on for this process and the processes it starts.
+
+    Only code imported after this call is decorated by traced.
+    """
+    global TRACE_PATH, ENABLED
+    TRACE_PATH = os.path.abspath(path)
+    ENABLED = True
+    os.environ[TRACE_ENV] = TRACE_PATH
+    instrument_sitk()
+
+def load_trace(path):
+    # Accepts the unterminated array written by _emit as well as a finished trace file
+    with open(path) as f:
+        text = f.read().strip()
+    if text.endswith(','):
+        text = text[:-1]
+    if not text.endswith(']'):
+        text += ']'
+    events = json.loads(text)
+    return events['traceEvents'] if isinstance(events, dict) else events
+
+def summarize(events):
+    # Total time, CPU, I/O and the largest peak memory per event name
+    totals = defaultdict(lambda: {'count': 0, 'wall_ms': 0.0, 'cpu_ms': 0.0, 'read_mb': 0.0, 'write_mb': 0.0, 'peak_rss_mb': 0.0})
+    for event in events:
+        if event.get('ph') != 'X':
+            continue
+        total = totals[event['name']]
+        args = event.get('args', {})
+        total['count'] += 1
+        total['wall_ms'] += event['dur'] / 1000
+        total['cpu_ms'] += args.get('cpu_ms', 0.0)
+        total['read_mb'] += args.get('read_bytes', 0) / 1e6
+        total['write_mb'] += args.get('write_bytes', 0) / 1e6
+        total['peak_rss_mb'] = max(total['peak_rss_mb'], args.get('peak_rss_mb', 0.0))
+    return sorted(totals.items(), key=lambda item: -item[1]['wall_ms'])
+
+if ENABLED:
+    instrument_sitk()
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise a trace recorded with SALTACII_TRACE=<path>.")
+    parser.add_argument('trace_path', type=str, help='Trace file (open it in chrome://tracing or ui.perfetto.dev for the timeline)')
+    parser.add_argument('--top', type=int, default=30, help='Number of entries shown (default: 30)')
+    args = parser.parse_args()
+
+    print(f"{'name':<48} {'count':>6} {'wall ms':>10} {'cpu ms':>10} {'read MB':>9} {'write MB':>9} {'peak MB':>8}")
+    for name, total in summarize(load_trace(args.trace_path))[:args.top]:
+        print(f"{name[:48]:<48} {total['count']:>6} {total['wall_ms']:>10.1f} {total['cpu_ms']:>10.1f} "
+              f"{total['read_mb']:>9.1f} {total['write_mb']:>9.1f} {total['peak_rss_mb']:>8.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import vtk
+import argparse
+import hashlib
+import os
+
+from image_io import read_vtk_image, file_hash
+from instrumentation import traced
+
+# Bumped whenever the meshes of an unchanged image change, so older cached meshes are not reused
+# (2: meshes are in physical space, including the direction matrix)
+MESH_VERSION = 2
+
+@traced
+def extract_iso_surface(image_data, value, target_reduction=0.9):
+    # Flying edges is the multi-threaded (vtkSMPTools) marching cubes implementation
+    contour = vtk.vtkFlyingEdges3D()
+    contour.SetInputData(image_data)
+    contour.SetValue(0, value)
+    contour.ComputeNormalsOff()
+    contour.ComputeGradientsOff()
+    contour.ComputeScalarsOff()
+    contour.Update()
+
+    surface = contour.GetOutput()
+    if surface.GetNumberOfPolys() == 0:
+        return surface
+
+    # Decimate the mesh so that it is small enough to reload quickly
+    decimate = vtk.vtkQuadricDecimation()
+    decimate.SetInputData(surface)
+    decimate.SetTargetReduction(target_reduction)
+    decimate.VolumePreservationOn()
+    decimate.Update()
+
+    normals = vtk.vtkPolyDataNormals()
+    normals.SetInputData(decimate.GetOutput())
+    normals.SplittingOff()
+    normals.Update()
+    return normals.GetOutput()
+
+def write_obj(polydata, fn):
+    writer = vtk.vtkOBJWriter()
+    writer.SetInputData(polydata)
+    writer.SetFileName(fn)
+    writer.Write()
+
+def cached_iso_surfaces(difference_path, threshold=200, target_reduction=0.9, cache_dir=None):
+    """
+    Extract the iso-surfaces of significant positive and negative BMD change from a difference image.
+
+    Parameters:
+    - difference_path: str, path to the difference image (*_difference.nii.gz)
+    - threshold: float, absolute change (mg HA/ccm) at which the surfaces are extracted
+    - target_reduction: float, fraction of triangles removed by the decimation
+    - cache_dir: str, directory holding the cached meshes (default: Mesh_Cache next to the input)
+
+    Returns:
+    - dict mapping 'positive' and 'negative' to the paths of the cached OBJ meshes
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(difference_path), "Mesh_Cache")
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # The cache key covers the image contents and every parameter that changes the mesh
+    key = hashlib.sha256(f"{file_hash(difference_path)}_{threshold}_{target_reduction}_{MESH_VERSION}".encode()).hexdigest()[:16]
+    base_name = os.path.basename(difference_path).replace('.nii.gz', '').replace('.nii', '')
+    mesh_paths = {
+        'positive': os.path.join(cache_dir, f"{base_name}_{key}_positive.obj"),
+        'negative': os.path.join(cache_dir, f"{base_name}_{key}_negative.obj"),
+    }
+
+    if all(os.path.exists(fn) for fn in mesh_paths.values()):
+        return mesh_paths
+
+    # Wrapped from SimpleITK without a copy; unlike vtkNIFTIImageReader this keeps the direction matrix, so the
+    # meshes are in the same physical space as the images
+    difference = read_vtk_image(difference_path)
+    for sign, value in (('positive', threshold), ('negative', -threshold)):
+        surface = extract_iso_surface(difference, value, target_reduction)
+        # Write to a temporary name first so an interrupted run never leaves a partial mesh in the cache
+        tmp_filename = mesh_paths[sign].replace('.obj', '.tmp.obj')
+        write_obj(surface, tmp_filename)
+        os.replace(tmp_filename, mesh_paths[sign])
+        print(f"Saved {sign} iso-surface ({surface.GetNumberOfPolys()} triangles) to {mesh_paths[sign]}")
+
+    return mesh_paths
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract and cache iso-surfaces of significant BMD change from a difference image.')
+    parser.add_argument('difference_path', type=str, help='Path to the difference image (.nii or .nii.gz)')
+    parser.add_argument('--threshold', type=float, default=200, help='Absolute BMD change for the iso-surfaces (default: 200)')
+    parser.add_argument('--target_reduction', type=float, default=0.9, help='Fraction of triangles removed by decimation (default: 0.9)')
+    parser.add_argument('--cache_dir', type=str, help='Directory for the cached meshes (default: Mesh_Cache next to the input)')
+    args = parser.parse_args()
+
+    cached_iso_surfaces(args.difference_path, args.threshold, args.target_reduction, args.cache_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pandas as pd
+import argparse
+import hashlib
+import json
+import os
+
+from ct_analysis import analyze_ct_images
+from catalog import refresh_catalog, select_paths, compartment_maps
+from compartments import WHOLE_BONE
+from results_store import append_results, read_results
+from study_metadata import load_study_metadata, annotate_leg_condition
+from repeated_measures import repeated_measures_tests
+from figures import render_figures
+
+GROUPBY = ['Bone', 'Leg Condition']
+RESULT_COLUMNS = ['Participant', 'Bone', 'Visit', 'Side', 'Leg Condition', 'Mean', 'Median', 'P25', 'P75', 'Path', 'Written']
+TEST_TABLES = ['tests', 'posthoc', 'bootstrap']
+MANIFEST_FILENAME = 'tests_manifest.json'
+
+# Settings of repeated_measures_tests; passed explicitly so they are part of every group's digest
+TEST_PARAMETERS = {'n_permutations': 10000, 'n_bootstrap': 10000, 'confidence': 0.95, 'seed': 0}
+
+def _load_tests(tests_dir):
+    tables = {}
+    for name in TEST_TABLES:
+        fn = os.path.join(tests_dir, f"{name}.parquet")
+        df = pd.read_parquet(fn) if os.path.exists(fn) else pd.DataFrame()
+        tables[name] = df if set(GROUPBY) <= set(df.columns) else pd.DataFrame(columns=GROUPBY)
+    manifest_path = os.path.join(tests_dir, MANIFEST_FILENAME)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    return tables, manifest
+
+def _save_tests(tests_dir, tables, manifest):
+    os.makedirs(tests_dir, exist_ok=True)
+    for name, df in tables.items():
+        fn = os.path.join(tests_dir, f"{name}.parquet")
+        df.to_parquet(f"{fn}.tmp", index=False)
+        os.replace(f"{fn}.tmp", fn)
+    # The manifest goes last, so an interrupted save re-tests its groups on the next run
+    manifest_path = os.path.join(tests_dir, MANIFEST_FILENAME)
+    with open(f"{manifest_path}.tmp", 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+
+def _group_key(group):
+    return '|'.join(str(value) for value in group)
+
+def group_digests(results, settings):
+    # Content hash of the rows each group is tested on (which images, which result of each, and their leg
+    # condition) and of the settings they are tested with (metrics, threshold, test parameters)
+    digests = {}
+    for group, data in results.groupby(GROUPBY, sort=True):
+        data = data[['Path', 'Written', 'Leg Condition']].sort_values('Path', ignore_index=True)
+        digest = hashlib.sha256(json.dumps(settings, sort_keys=True).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+        digests[_group_key(group)] = digest.hexdigest()
+    return digests
+
+def _replace_groups(stored, updated, groups):
+    # Drop the stored rows of the re-tested groups and put the new ones in their place
+    if stored.empty:
+        return updated.reset_index(drop=True)
+    keys = pd.MultiIndex.from_frame(stored[GROUPBY])
+    kept = stored[~keys.isin(groups)]
+    return pd.concat([kept, updated], ignore_index=True).sort_values(GROUPBY, kind='stable', ignore_index=True)
+
+def longitudinal_update(study_root, participants, visits, bones=('Femur', 'Tibia', 'Patella'), product='common',
+                        results_root='results_store', tests_dir='group_tests', figure_dir='figures', threshold=1500,
+                        metrics=('Mean', 'Median'), metadata=None, max_workers=None, test_parameters=None, compartment=WHOLE_BONE):
+    """
+    Bring the stored results, group tests and figures up to date after new visits arrive.
+
+    Only images that are new or modified since the last catalog refresh, missing from the results store, or
+    modified after their stored result was written are analysed, together with the compartments of bones that have
+    a compartment label map (e.g. from the scheduler's compartments stage). Only the bone / leg-condition groups whose tested
+    rows changed (a new or re-analysed image, an image or participant dropped, a leg condition edited in the study
+    metadata) are re-tested, and only figures whose data changed are redrawn.
+
+    Parameters:
+    - study_root: str, study root containing one folder per participant
+    - participants: list of str, participants in the analysis
+    - visits: list of str, visits in the analysis (e.g. ['V1', 'V2', 'V3', 'V4'])
+    - bones: sequence of str, bones in the analysis
+    - product: str, image product analysed (e.g. 'common')
+    - results_root: str, directory of the results store
+    - tests_dir: str, directory of the stored group test tables (tests, posthoc, bootstrap)
+    - figure_dir: str, directory of the figures (None to skip the figures)
+    - threshold: float, values above this are clipped before the statistics
+    - metrics: sequence of str, metrics tested and plotted
+    - metadata: pandas DataFrame from load_study_metadata (default: study_metadata.csv)
+    - max_workers: int, number of worker processes for each stage
+    - test_parameters: dict, overrides of TEST_PARAMETERS passed to repeated_measures_tests
+    - compartment: str, compartment whose results are tested and plotted (e.g. 'Cortical'; default: whole bone).
+      The stored tests hold one compartment at a time, so give each compartment its own tests_dir and figure_dir
+
+    Returns:
+    - results: pandas DataFrame of annotated per-image results for the whole analysis
+    - tests, posthoc, bootstrap: pandas DataFrames of the group tests for the whole analysis
+    - affected: list of (Bone, Leg Condition) tuples that were re-tested
+    """
+    if metadata is None:
+        metadata = load_study_metadata()
+    catalog, changed = refresh_catalog(study_root)
+    changed = set(changed)
+
+    paths = []
+    for bone in bones:
+        paths += select_paths(catalog, product=product, bone=bone, participants=participants, visits=visits)
+
+    # An image is pending if the catalog saw it or its compartment label map change, it has no stored result, or
+    # it or its label map was modified after its result was written (e.g. the catalog was refreshed by another run
+    # in between)
+    compartments = compartment_maps(catalog, paths)
+    stored = read_results(results_root, columns=['Path', 'Written'], product=product, participants=participants, threshold=threshold)
+    written = dict(zip(stored['Path'], pd.to_datetime(stored['Written'], utc=True).dt.as_unit('ns').astype('int64')))
+    modified = dict(zip(catalog['path'], catalog['mtime_ns']))
+    def is_pending(path):
+        sources = [path] + ([compartments[path]] if path in compartments else [])
+        return path not in written or any(fn in changed or modified[fn] > written[path] for fn in sources)
+    pending = [path for path in paths if is_pending(path)]
+
+    if pending:
+        new_results = analyze_ct_images(ct_image_paths=pending, threshold=threshold, max_workers=max_workers, compartments=compartments)
+        append_results(new_results, results_root)
+
+    results = pd.concat([read_results(results_root, columns=RESULT_COLUMNS, bone=bone, visits=visits, product=product,
+                                      participants=participants, threshold=threshold, compartment=compartment) for bone in bones],
+                        ignore_index=True)
+    # Images no longer in the study root (e.g. excluded scans) drop out of the analysis
+    results = annotate_leg_condition(results[results['Path'].isin(paths)], metadata).reset_index(drop=True)
+
+    # Re-test the groups whose rows or test settings changed since they were last tested (any group never tested
+    # before, e.g. on the first run, has no stored digest); groups of the analysed bones left without any rows are
+    # dropped from the tables. Groups of other bones keep their tables and digests.
+    test_parameters = {**TEST_PARAMETERS, **(test_parameters or {})}
+    settings = {'product': product, 'compartment': compartment, 'threshold': float(threshold), 'metrics': list(metrics), **test_parameters}
+    tables, manifest = _load_tests(tests_dir)
+    digests = group_digests(results, settings)
+    groups = set(results[GROUPBY].itertuples(index=False, name=None))
+    tested = set(tables['tests'][GROUPBY].itertuples(index=False, name=None))
+    affected = sorted(group for group in groups if manifest.get(_group_key(group)) != digests[_group_key(group)])
+    removed = sorted(group for group in tested - groups if group[0] in bones)
+    results = results.drop(columns=['Path', 'Written'])
+
+    if affected or removed:
+        updated = {name: pd.DataFrame(columns=GROUPBY) for name in TEST_TABLES}
+        if affected:
+            subset = results[pd.MultiIndex.from_frame(results[GROUPBY]).isin(affected)]
+            updated = dict(zip(TEST_TABLES, repeated_measures_tests(subset, groupby=GROUPBY, metrics=list(metrics),
+                                                                     max_workers=max_workers, **test_parameters)))
+        tables = {name: _replace_groups(tables[name], updated[name], affected + removed) for name in TEST_TABLES}
+        for group in removed:
+            manifest.pop(_group_key(group), None)
+        manifest.update({_group_key(group): digests[_group_key(group)] for group in affected})
+        _save_tests(tests_dir, tables, manifest)
+
+    if figure_dir is not None:
+        render_figures(results, figure_dir, metrics=list(metrics), max_workers=max_workers)
+
+    print(f"{len(pending)} new or modified images analysed, {len(affected)} groups re-tested")
+    return results, tables['tests'], tables['posthoc'], tables['bootstrap'], affected
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally update results, group tests and figures after new visits arrive.")
+    parser.add_argument('study_root', type=str, help='Directory containing one folder per participant')
+    parser.add_argument('--participants', type=str, nargs='+', required=True, help='Participants in the analysis (e.g. SALTACII_0021)')
+    parser.add_argument('--visits', type=str, nargs='+', default=['V1', 'V2', 'V3', 'V4'], help='Visits in the analysis (default: V1 V2 V3 V4)')
+    parser.add_argument('--bones', type=str, nargs='+', default=['Femur', 'Tibia', 'Patella'], help='Bones in the analysis')
+    parser.add_argument('--results_root', type=str, default='results_store', help='Directory of the results store')
+    parser.add_argument('--tests_dir', type=str, default='group_tests', help='Directory of the stored group tests')
+    parser.add_argument('--figure_dir', type=str, default='figures', help='Directory of the figures')
+    parser.add_argument('--threshold', type=float, default=1500, help='Upper clipping threshold (default: 1500)')
+    parser.add_argument('--compartment', type=str, default=WHOLE_BONE, help='Compartment tested and plotted, e.g. Cortical (default: Whole)')
+    args = parser.parse_args()
+
+    _, tests, _, _, affected = longitudinal_update(args.study_root, args.participants, args.visits, args.bones,
+                                                   results_root=args.results_root, tests_dir=args.tests_dir,
+                                                   figure_dir=args.figure_dir, threshold=args.threshold, compartment=args.compartment)
+    for bone, leg in affected:
+        print(tests[(tests['Bone'] == bone) & (tests['Leg Condition'] == leg)].to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import SimpleITK as sitk
+import argparse
+import glob
+import os
+import time
+from collections import defaultdict
+
+from image_io import read_image, write_image
+from instrumentation import span
+from bone_utils import LABELS_PATH, load_labels, crop_image
+from catalog import CALIBRATED_PATTERN
+import extract_crop
+import treece_crop
+from cortical_profiles import cached_profiles
+from registration import cached_registration
+from common_region import common_region, scan_geometry
+from crm import common_mask
+from common_region_crop import common_region_crop, crop_common_region_mask, resample_common_region
+from compartments import segment_compartments, DEFAULT_PARAMETERS as COMPARTMENT_PARAMETERS
+from voxel_difference import voxel_difference, difference_filename
+from checkerboard import save_checkerboard, checkerboard_filename
+
+# Stages in dependency order
+STAGES = ['extract_crop', 'treece_crop', 'cortical_profiles', 'registration', 'common_region', 'crm', 'common_region_crop', 'compartments',
+          'difference', 'checkerboard']
+
+def bone_path(participant_dir, participant, visit, description, suffix):
+    # e.g. <participant_dir>/Femur_Right/SALTACII_0004_V2_Femur_Right_cropped.nii.gz
+    return os.path.join(participant_dir, description, f"{participant}_{visit}_{description}_{suffix}.nii.gz")
+
+def find_visits(participant_dir):
+    # Calibrated CT of each visit, e.g. SALTACII_0004_V1_CAL.nii.gz
+    visits = {}
+    for fn in glob.glob(os.path.join(participant_dir, '*_CAL.nii*')):
+        match = CALIBRATED_PATTERN.match(os.path.basename(fn))
+        if match:
+            visits[match['visit']] = (match['participant'], fn)
+    return visits
+
+def transformed_path(participant_dir, participant, visit, description, baseline):
+    # The baseline crop is the registration target; follow-ups use their registered (transformed) crop
+    if visit == baseline:
+        return bone_path(participant_dir, participant, visit, description, 'cropped')
+    for suffix in ('Transformed', 'cropped_Transformed'):
+        fn = bone_path(participant_dir, participant, visit, description, suffix)
+        if os.path.exists(fn):
+            return fn
+    return None
+
+def transform_path(participant_dir, participant, visit, description, baseline):
+    # e.g. <participant_dir>/Femur_Right/SALTACII_0004_V2_Femur_Right_to_V1.tfm
+    return os.path.join(participant_dir, description, f"{participant}_{visit}_{description}_to_{baseline}.tfm")
+
+def timed(timings, stage, function, *args):
+    # Run one step of a stage, adding its wall time to timings[stage] (if given) and to the trace
+    start = time.perf_counter()
+    with span(stage, 'stage', step=function.__name__):
+        result = function(*args)
+    if timings is not None:
+        timings[stage] += time.perf_counter() - start
+    return result
+
+def write(image, fn):
+    os.makedirs(os.path.dirname(fn), exist_ok=True)
+    write_image(image, fn)
+
+def crop_visit(participant_dir, participant, visit, ct_path, labels, stages=('extract_crop', 'treece_crop'), label_map_suffix='labels',
+               kernel_radius=(1, 1, 1), treece_kernel_radius=(2, 2, 2), buffer=30, timings=None):
+    # extract_crop and treece_crop of every label of one visit, sharing the decoded CT and label map
+    main_image = read_image(ct_path)
+    mask_image = read_image(os.path.join(participant_dir, f"{participant}_{visit}_{label_map_suffix}.nii.gz"))
+    for label, description in labels:
+        if 'extract_crop' in stages:
+            masked_image, dilated_mask = timed(timings, 'extract_crop', extract_crop.process_label, label, description,
+                                               main_image, mask_image, kernel_radius, None, None)
+            cropped_image, cropped_mask = timed(timings, 'extract_crop', crop_image, masked_image, dilated_mask, buffer)
+            timed(timings, 'extract_crop', write, cropped_image, bone_path(participant_dir, participant, visit, description, 'cropped'))
+            timed(timings, 'extract_crop', write, cropped_mask, bone_path(participant_dir, participant, visit, description, 'cropped_mask'))
+        if 'treece_crop' in stages:
+            dilated_mask = timed(timings, 'treece_crop', treece_crop.process_label, label, description, main_image, mask_image, treece_kernel_radius)
+            cropped_image, cropped_mask = timed(timings, 'treece_crop', crop_image, main_image, dilated_mask, buffer)
+            timed(timings, 'treece_crop', write, cropped_image, bone_path(participant_dir, participant, visit, description, 'treece_cropped'))
+            timed(timings, 'treece_crop', write, cropped_mask, bone_path(participant_dir, participant, visit, description, 'treece_cropped_mask'))
+
+def bone_profiles(participant_dir, participant, visit, description, timings=None):
+    # Cortical profiles along the surface normals of the treece_crop mask, cached as *_profiles.npz
+    image_fn = bone_path(participant_dir, participant, visit, description, 'treece_cropped')
+    mask_fn = bone_path(participant_dir, participant, visit, description, 'treece_cropped_mask')
+    if not (os.path.exists(image_fn) and os.path.exists(mask_fn)):
+        print(f"Skipping cortical_profiles for {description} {visit}: treece crop missing")
+        return
+    timed(timings, 'cortical_profiles', cached_profiles, image_fn, mask_fn)
+
+def bone_registration(participant_dir, participant, visit, baseline, description, registration_parameters=None, timings=None):
+    # Register one follow-up crop to the baseline crop; the transform is cached on disk for common_region_crop
+    fixed_fn = bone_path(participant_dir, participant, baseline, description, 'cropped')
+    moving_fn = bone_path(participant_dir, participant, visit, description, 'cropped')
+    mask_fn = bone_path(participant_dir, participant, baseline, description, 'cropped_mask')
+    if not (os.path.exists(fixed_fn) and os.path.exists(moving_fn)):
+        print(f"Skipping registration for {description} {visit}: baseline or follow-up crop missing")
+        return
+    timed(timings, 'registration', cached_registration, fixed_fn, moving_fn,
+          transform_path(participant_dir, participant, visit, description, baseline),
+          mask_fn if os.path.exists(mask_fn) else None, registration_parameters)
+
+def bone_fov_intersection(participant_dir, participant, ct_paths, baseline, description, shape='box', timings=None):
+    """
+    Common region of all visits of one bone on the baseline crop grid: the intersection of the scan extents
+    (box, or box and reconstruction circle) mapped through the cached registration transforms.
+
+    A visit with an irregular field of view can provide a valid-region mask in its CT space,
+    {participant}_{visit}_fov.nii.gz, which is intersected voxel by voxel instead.
+    """
+    reference_fn = bone_path(participant_dir, participant, baseline, description, 'cropped')
+    if not os.path.exists(reference_fn):
+        print(f"Skipping common_region for {description}: baseline crop missing")
+        return
+    fields_of_view = []
+    for visit, ct_path in ct_paths.items():
+        transform_fn = transform_path(participant_dir, participant, visit, description, baseline)
+        if visit != baseline and not os.path.exists(transform_fn):
+            print(f"Skipping common_region for {description}: {visit} is not registered")
+            return
+        transform = sitk.ReadTransform(transform_fn) if visit != baseline else None
+        fov_fn = os.path.join(participant_dir, f"{participant}_{visit}_fov.nii.gz")
+        mask = read_image(fov_fn) if os.path.exists(fov_fn) else None
+        fields_of_view.append((scan_geometry(ct_path), transform, mask))
+    region = timed(timings, 'common_region', common_region, read_image(reference_fn), fields_of_view, shape)
+    timed(timings, 'common_region', write, region, bone_path(participant_dir, participant, baseline, description, 'common_region'))
+
+def bone_common_mask(participant_dir, participant, baseline, description, timings=None):
+    # crm: common region of all visits times the baseline bone mask
+    common_region_fn = bone_path(participant_dir, participant, baseline, description, 'common_region')
+    if not os.path.exists(common_region_fn):
+        print(f"Skipping crm for {description}: no common region image {common_region_fn}")
+        return
+    baseline_mask = timed(timings, 'crm', read_image, bone_path(participant_dir, participant, baseline, description, 'cropped_mask'))
+    common_region = timed(timings, 'crm', read_image, common_region_fn)
+    result = timed(timings, 'crm', common_mask, common_region, baseline_mask)
+    timed(timings, 'crm', write, result, bone_path(participant_dir, participant, baseline, description, 'common_mask'))
+
+def bone_common_region(participant_dir, participant, visits, baseline, description, buffer=30, timings=None):
+    """
+    common_region_crop of all visits of one bone, sharing the common mask and its bounding box.
+
+    Visits with a cached registration transform are resampled from their crop onto the common region's
+    bounding box only; visits registered outside this pipeline use their *_Transformed image.
+    """
+    common_mask_fn = bone_path(participant_dir, participant, baseline, description, 'common_mask')
+    if not os.path.exists(common_mask_fn):
+        print(f"Skipping common_region_crop for {description}: no common mask {common_mask_fn}")
+        return
+    mask = timed(timings, 'common_region_crop', read_image, common_mask_fn)
+    cropped_mask = timed(timings, 'common_region_crop', crop_common_region_mask, mask, buffer)
+    for visit in visits:
+        transform_fn = transform_path(participant_dir, participant, visit, description, baseline)
+        if visit == baseline or os.path.exists(transform_fn):
+            image_fn = bone_path(participant_dir, participant, visit, description, 'cropped')
+            if not os.path.exists(image_fn):
+                print(f"Skipping common_region_crop for {description} {visit}: crop missing")
+                continue
+            transform = sitk.ReadTransform(transform_fn) if visit != baseline else None
+            image = timed(timings, 'common_region_crop', read_image, image_fn)
+            common = timed(timings, 'common_region_crop', resample_common_region, image, cropped_mask, transform)
+        else:
+            image_fn = transformed_path(participant_dir, participant, visit, description, baseline)
+            if image_fn is None:
+                print(f"Skipping common_region_crop for {description} {visit}: not registered")
+                continue
+            image = timed(timings, 'common_region_crop', read_image, image_fn)
+            common, _ = timed(timings, 'common_region_crop', common_region_crop, image, mask, buffer)
+        timed(timings, 'common_region_crop', write, common, bone_path(participant_dir, participant, visit, description, 'common'))
+    # Statistics mask in the space of the *_common images
+    timed(timings, 'common_region_crop', write, cropped_mask, bone_path(participant_dir, participant, baseline, description, 'cropped_common_mask'))
+
+def bone_compartments(participant_dir, participant, baseline, description, compartment_parameters=None, timings=None):
+    # Cortical and trabecular label map from the baseline common image, shared by the statistics of every visit
+    mask_fn = bone_path(participant_dir, participant, baseline, description, 'cropped_common_mask')
+    image_fn = bone_path(participant_dir, participant, baseline, description, 'common')
+    if not (os.path.exists(mask_fn) and os.path.exists(image_fn)):
+        print(f"Skipping compartments for {description}: no baseline common image")
+        return
+    parameters = {**COMPARTMENT_PARAMETERS, **(compartment_parameters or {})}
+    mask = timed(timings, 'compartments', read_image, mask_fn)
+    image = timed(timings, 'compartments', read_image, image_fn)
+    labels = timed(timings, 'compartments', segment_compartments, mask, image, parameters['cortical_threshold'],
+                   parameters['max_depth_mm'], parameters['rim_mm'], parameters['closing_radius'], parameters['in_plane'])
+    timed(timings, 'compartments', write, labels, bone_path(participant_dir, participant, baseline, description, 'compartments'))
+
+def bone_difference(participant_dir, participant, visit, baseline, description, gaussian_sigma=None, timings=None):
+    baseline_fn = bone_path(participant_dir, participant, baseline, description, 'common')
+    followup_fn = bone_path(participant_dir, participant, visit, description, 'common')
+    if not (os.path.exists(baseline_fn) and os.path.exists(followup_fn)):
+        return
+    baseline_image = timed(timings, 'difference', read_image, baseline_fn)
+    followup_image = timed(timings, 'difference', read_image, followup_fn)
+    difference = timed(timings, 'difference', voxel_difference, baseline_image, followup_image, gaussian_sigma)
+    timed(timings, 'difference', write, difference, difference_filename(baseline_fn, baseline, visit, gaussian_sigma))
+
+def bone_checkerboard(participant_dir, participant, visit, baseline, description, checker_squares=(20, 20, 20), slice_number=50, timings=None):
+    baseline_fn = bone_path(participant_dir, participant, baseline, description, 'common')
+    followup_fn = bone_path(participant_dir, participant, visit, description, 'common')
+    if not (os.path.exists(baseline_fn) and os.path.exists(followup_fn)):
+        return
+    baseline_image = timed(timings, 'checkerboard', read_image, baseline_fn)
+    followup_image = timed(timings, 'checkerboard', read_image, followup_fn)
+    output_filename = checkerboard_filename(baseline_fn, baseline, visit, slice_number)
+    timed(timings, 'checkerboard', save_checkerboard, baseline_image, followup_image, output_filename,
+          baseline, visit, checker_squares, slice_number)
+
+def run_participant(participant_dir, stages=STAGES, labels_csv=LABELS_PATH, label_of_interest=None, label_map_suffix='labels',
+                    baseline='V1', kernel_radius=(1, 1, 1), treece_kernel_radius=(2, 2, 2), buffer=30,
+                    gaussian_sigma=None, checker_squares=(20, 20, 20), slice_number=50, fov_shape='box'):
+    """
+    Run the per-participant pipeline stages in one process.
+
+    Every image is decoded at most once: the calibrated CT and label map are shared by extract_crop and
+    treece_crop, and each written output stays in the in-memory image cache for the stages that consume it.
+    Registration transforms are cached on disk, so a rerun only registers crops that changed.
+
+    Parameters:
+    - participant_dir: str, directory with the calibrated CT of each visit ({participant}_{visit}_CAL.nii.gz)
+      and its label map ({participant}_{visit}_{label_map_suffix}.nii.gz)
+    - stages: sequence of str, stages to run (see STAGES); they always run in dependency order
+    - labels_csv: str, CSV of labels and descriptions
+    - label_of_interest: int, only process this label (optional)
+    - label_map_suffix: str, suffix of the label map file of each visit
+    - baseline: str, baseline visit the follow-ups are registered to
+    - kernel_radius, treece_kernel_radius: sequence of int, label dilation radii of extract_crop and treece_crop
+    - buffer: int, crop buffer around the masks (voxels)
+    - gaussian_sigma: float, smooth the difference images with this sigma (optional)
+    - checker_squares: sequence of int, number of checkerboard squares per dimension
+    - slice_number: int, slice shown in the checkerboard figures
+    - fov_shape: str, field of view of each scan for the common region, 'box' or 'cylinder'
+
+    Returns:
+    - timings: dict, wall time (s) of each stage that ran
+    """
+    stages = [stage for stage in STAGES if stage in stages]
+    visits = find_visits(participant_dir)
+    if baseline not in visits:
+        raise ValueError(f"No {baseline} calibrated CT in {participant_dir}")
+    participant = visits[baseline][0]
+    followups = sorted(visit for visit in visits if visit != baseline)
+    labels = load_labels(labels_csv, label_of_interest)
+    timings = defaultdict(float)
+
+    crop_stages = [stage for stage in stages if stage in ('extract_crop', 'treece_crop')]
+    if crop_stages:
+        for visit in [baseline] + followups:
+            crop_visit(participant_dir, participant, visit, visits[visit][1], labels, crop_stages, label_map_suffix,
+                       kernel_radius, treece_kernel_radius, buffer, timings)
+    for _, description in labels:
+        if 'cortical_profiles' in stages:
+            for visit in [baseline] + followups:
+                bone_profiles(participant_dir, participant, visit, description, timings)
+        if 'registration' in stages:
+            for visit in followups:
+                bone_registration(participant_dir, participant, visit, baseline, description, timings=timings)
+        if 'common_region' in stages:
+            bone_fov_intersection(participant_dir, participant, {visit: visits[visit][1] for visit in [baseline] + followups},
+                                  baseline, description, fov_shape, timings)
+        if 'crm' in stages:
+            bone_common_mask(participant_dir, participant, baseline, description, timings)
+        if 'common_region_crop' in stages:
+            bone_common_region(participant_dir, participant, [baseline] + followups, baseline, description, buffer, timings)
+        if 'compartments' in stages:
+            bone_compartments(participant_dir, participant, baseline, description, timings=timings)
+        for visit in followups:
+            if 'difference' in stages:
+                bone_difference(participant_dir, participant, visit, baseline, description, gaussian_sigma, timings)
+            if 'checkerboard' in stages:
+                bone_checkerboard(participant_dir, participant, visit, baseline, description, checker_squares, slice_number, timings)
+    return dict(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the pipeline stages for one participant in a single process.")
+    parser.add_argument('participant_dir', type=str, help='Directory with the calibrated CT and label map of each visit')
+    parser.add_argument('--stages', type=str, nargs='+', choices=STAGES, default=STAGES, help='Stages to run (default: all)')
+    parser.add_argument('--labels_csv', type=str, default=LABELS_PATH, help='CSV of labels and descriptions (default: ML_labels.csv)')
+    parser.add_argument('--label_of_interest', type=int, help='Specific label to process (optional)')
+    parser.add_argument('--label_map_suffix', type=str, default='labels', help="Label map of each visit: {participant}_{visit}_{suffix}.nii.gz (default: labels)")
+    parser.add_argument('--baseline', type=str, default='V1', help='Baseline visit (default: V1)')
+    parser.add_argument('--kernel_radius', type=int, nargs='+', default=[1, 1, 1], help='Dilation radius for extract_crop (e.g., 1 1 1)')
+    parser.add_argument('--treece_kernel_radius', type=int, nargs='+', default=[2, 2, 2], help='Dilation radius for treece_crop (e.g., 2 2 2)')
+    parser.add_argument('--buffer', type=int, default=30, help="Buffer size around the mask (default: 30).")
+    parser.add_argument('--gaussian_sigma', type=float, help='Smooth the difference images with this sigma (optional)')
+    parser.add_argument('--checker_squares', type=int, nargs='+', default=[20, 20, 20], help='Number of squares in checkerboard (e.g., 20 20 20)')
+    parser.add_argument('--slice', type=int, default=50, help='Slice number shown in the checkerboard figures')
+    parser.add_argument('--fov_shape', type=str, choices=['box', 'cylinder'], default='box', help='Field of view of each scan for the common region (default: box)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    timings = run_participant(args.participant_dir, args.stages, args.labels_csv, args.label_of_interest, args.label_map_suffix,
+                              args.baseline, args.kernel_radius, args.treece_kernel_radius, args.buffer,
+                              args.gaussian_sigma, args.checker_squares, args.slice, args.fov_shape)
+    for stage in STAGES:
+        if stage in timings:
+            print(f"{stage:<20} {timings[stage]:8.2f} s")
+    print(f"{'total':<20} {time.perf_counter() - start:8.2f} s")
+
+if __name__ == "__main__":
+    main()
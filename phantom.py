@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import SimpleITK as sitk
+import numpy as np
+import argparse
+import json
+import os
+
+from bone_utils import LABELS_PATH, load_labels
+
+# Volume sizes (z, y, x) of the synthetic scans; the field of view is the same, only the resolution changes
+SIZES = {
+    'small': (96, 96, 96),
+    'medium': (192, 160, 160),
+    'large': (320, 256, 256),
+}
+
+FIELD_OF_VIEW_MM = (400.0, 200.0, 300.0)
+
+# Calibrated densities (mg HA/cm³)
+SOFT_TISSUE = 0
+TRABECULAR = 250
+CORTICAL = 1100
+SCREW = 3000
+
+# Change of trabecular density per follow-up visit
+INJURED_CHANGE = -0.03
+CONTRALATERAL_CHANGE = -0.005
+
+# Bone geometry in normalised (z, y, x) coordinates: centre, radii and z extent; x is mirrored for the left leg
+GEOMETRY = {
+    'Femur': {'shape': 'cylinder', 'center': (0.0, 0.45, 0.28), 'radius': (0.0, 0.09, 0.07), 'z': (0.04, 0.48)},
+    'Tibia': {'shape': 'cylinder', 'center': (0.0, 0.47, 0.28), 'radius': (0.0, 0.08, 0.065), 'z': (0.53, 0.96)},
+    'Fibula': {'shape': 'cylinder', 'center': (0.0, 0.52, 0.39), 'radius': (0.0, 0.025, 0.02), 'z': (0.56, 0.96)},
+    'Patella': {'shape': 'ellipsoid', 'center': (0.48, 0.25, 0.28), 'radius': (0.05, 0.035, 0.05), 'z': (0.0, 1.0)},
+}
+
+def _bone_radius(shape, geometry, side):
+    # Normalised radius (< 1 inside the bone) of one bone, broadcast from open grids
+    z, y, x = (np.linspace(0.0, 1.0, n, dtype=np.float32)[tuple(slice(None) if a == axis else None for a in range(3))]
+               for axis, n in enumerate(shape))
+    cz, cy, cx = geometry['center']
+    rz, ry, rx = geometry['radius']
+    if side == 'Left':
+        cx = 1.0 - cx
+    rho = ((y - cy) / ry) ** 2 + ((x - cx) / rx) ** 2
+    if geometry['shape'] == 'ellipsoid':
+        rho = rho + ((z - cz) / rz) ** 2
+    z0, z1 = geometry['z']
+    return np.where((z >= z0) & (z <= z1), np.sqrt(rho), np.float32(np.inf))
+
+def make_phantom(shape, visits=('V1', 'V2', 'V3', 'V4'), injured_side='Left', labels_csv=LABELS_PATH, seed=0, screw=True):
+    """
+    Synthetic calibrated CT of both knees with an ML-style label map and simulated follow-up visits.
+
+    Each bone in ML_labels.csv is a cylinder (femur, tibia, fibula) or ellipsoid (patella) with a cortical
+    shell and a trabecular core. The trabecular density of the injured leg changes by INJURED_CHANGE per
+    follow-up visit and the contralateral leg by CONTRALATERAL_CHANGE. A screw above the 1500 mg HA/cm³
+    threshold is placed in the injured tibia.
+
+    Parameters:
+    - shape: tuple of int, volume size (z, y, x)
+    - visits: sequence of str, visit names, the first is the baseline
+    - injured_side: str, 'Left' or 'Right'
+    - labels_csv: str, CSV of labels and descriptions
+    - seed: int, seed of the image noise
+    - screw: bool, add the screw
+
+    Returns:
+    - label_map: sitk.Image (uint8)
+    - scans: dict, visit -> sitk.Image (int16)
+    - truth: dict, description -> list of the trabecular density at each visit
+    """
+    rng = np.random.default_rng(seed)
+    spacing = [fov / n for fov, n in zip(FIELD_OF_VIEW_MM, shape)]
+    labels = np.zeros(shape, dtype=np.uint8)
+    cortical = np.zeros(shape, dtype=bool)
+    truth = {}
+    for label, description in load_labels(labels_csv):
+        bone, side = description.split('_')
+        rho = _bone_radius(shape, GEOMETRY[bone], side)
+        inside = rho < 1.0
+        labels[inside] = label
+        cortical |= inside & (rho >= 0.75)
+        change = INJURED_CHANGE if side == injured_side else CONTRALATERAL_CHANGE
+        truth[description] = [TRABECULAR * (1.0 + change) ** i for i in range(len(visits))]
+
+    screw_mask = None
+    if screw:
+        geometry = dict(GEOMETRY['Tibia'], radius=(0.0, 0.012, 0.012), z=(0.58, 0.7))
+        screw_mask = _bone_radius(shape, geometry, injured_side) < 1.0
+
+    scans = {}
+    descriptions = dict(load_labels(labels_csv))
+    for i, visit in enumerate(visits):
+        trabecular = np.zeros(256, dtype=np.float32)
+        for label, description in descriptions.items():
+            trabecular[label] = truth[description][i]
+        ct = np.where(labels > 0, trabecular[labels], np.float32(SOFT_TISSUE))
+        ct[cortical] = CORTICAL
+        if screw_mask is not None:
+            ct[screw_mask] = SCREW
+        ct += rng.normal(0.0, 20.0, size=shape).astype(np.float32)
+        image = sitk.GetImageFromArray(np.rint(ct).astype(np.int16))
+        image.SetSpacing(spacing[::-1])
+        scans[visit] = image
+
+    label_map = sitk.GetImageFromArray(labels)
+    label_map.SetSpacing(spacing[::-1])
+    return label_map, scans, truth
+
+def write_phantom(output_dir, shape, participant='SALTACII_9000', visits=('V1', 'V2', 'V3', 'V4'), **kwargs):
+    """
+    Write a phantom participant in the layout the pipeline expects:
+    {participant}_{visit}_CAL.nii.gz, {participant}_{visit}_labels.nii.gz and phantom.json with the known densities.
+
+    Returns:
+    - participant_dir: str
+    """
+    participant_dir = os.path.join(output_dir, participant)
+    os.makedirs(participant_dir, exist_ok=True)
+    label_map, scans, truth = make_phantom(shape, visits, **kwargs)
+    for visit, image in scans.items():
+        sitk.WriteImage(image, os.path.join(participant_dir, f"{participant}_{visit}_CAL.nii.gz"))
+        sitk.WriteImage(label_map, os.path.join(participant_dir, f"{participant}_{visit}_labels.nii.gz"))
+    with open(os.path.join(participant_dir, 'phantom.json'), 'w') as f:
+        json.dump({'shape': list(shape), 'visits': list(visits), 'trabecular_density': truth}, f, indent=1)
+    return participant_dir
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic calibrated CT phantom participant with simulated follow-up visits.")
+    parser.add_argument('output_dir', type=str, help='Directory the participant folder is written to')
+    parser.add_argument('--size', type=str, choices=list(SIZES), default='small', help='Volume size (default: small)')
+    parser.add_argument('--participant', type=str, default='SALTACII_9000', help='Participant ID (default: SALTACII_9000)')
+    parser.add_argument('--visits', type=str, nargs='+', default=['V1', 'V2', 'V3', 'V4'], help='Visits (default: V1 V2 V3 V4)')
+    parser.add_argument('--injured_side', type=str, choices=['Left', 'Right'], default='Left', help='Injured leg (default: Left)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the image noise')
+    args = parser.parse_args()
+
+    participant_dir = write_phantom(args.output_dir, SIZES[args.size], args.participant, args.visits,
+                                    injured_side=args.injured_side, seed=args.seed)
+    print(f"Phantom written to {participant_dir}")
+
+if __name__ == "__main__":
+    main()
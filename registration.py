@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import SimpleITK as sitk
+import argparse
+import hashlib
+import json
+import numpy as np
+import os
+
+from image_io import read_image, write_image, file_hash
+from instrumentation import traced
+
+# Pyramid levels (coarse to fine), metric sampling and optimizer settings; part of the transform cache key
+DEFAULT_PARAMETERS = {
+    'shrink_factors': [4, 2, 1],
+    'smoothing_sigmas': [2.0, 1.0, 0.0],
+    'histogram_bins': 50,
+    'sampling_percentage': 0.2,
+    'min_samples': 2000,
+    'learning_rate': 1.0,
+    'iterations': 200,
+    'seed': 0,
+}
+
+@traced
+def register(fixed, moving, fixed_mask=None, parameters=None, threads=None):
+    """
+    Rigidly align a follow-up crop to its baseline crop.
+
+    Multi-resolution (image pyramid) registration with Mattes mutual information, sampled at random voxels
+    inside the baseline bone mask only, optimised with regular step gradient descent. Small bones (e.g. the
+    fibula) skip the coarse levels that would leave fewer than min_samples voxels in the mask, and every
+    level samples at least min_samples voxels where the mask has them. The metric is evaluated on all
+    threads SimpleITK is allowed (see concurrency.py) unless threads is given.
+
+    Parameters:
+    - fixed: sitk.Image, baseline crop
+    - moving: sitk.Image, follow-up crop
+    - fixed_mask: sitk.Image, baseline bone mask restricting the metric samples (optional)
+    - parameters: dict, overrides of DEFAULT_PARAMETERS
+    - threads: int, threads of the metric evaluation (optional)
+
+    Returns:
+    - transform: sitk.Euler3DTransform mapping baseline points to follow-up points
+    - metric: float, final metric value
+    """
+    parameters = {**DEFAULT_PARAMETERS, **(parameters or {})}
+    fixed = sitk.Cast(fixed, sitk.sitkFloat32)
+    moving = sitk.Cast(moving, sitk.sitkFloat32)
+    initial = sitk.CenteredTransformInitializer(fixed, moving, sitk.Euler3DTransform(),
+                                                sitk.CenteredTransformInitializerFilter.GEOMETRY)
+
+    # Pyramid levels and sampling percentages that keep enough samples for the joint histogram
+    n_voxels = int(np.count_nonzero(sitk.GetArrayViewFromImage(fixed_mask))) if fixed_mask is not None else fixed.GetNumberOfPixels()
+    levels = [(shrink, sigma) for shrink, sigma in zip(parameters['shrink_factors'], parameters['smoothing_sigmas'])
+              if shrink == 1 or n_voxels / shrink ** 3 >= parameters['min_samples']]
+    if not levels:
+        levels = [(1, 0.0)]
+    percentages = [min(1.0, max(parameters['sampling_percentage'], parameters['min_samples'] * shrink ** 3 / max(n_voxels, 1)))
+                   for shrink, _ in levels]
+
+    method = sitk.ImageRegistrationMethod()
+    method.SetMetricAsMattesMutualInformation(numberOfHistogramBins=parameters['histogram_bins'])
+    method.SetMetricSamplingStrategy(method.RANDOM)
+    method.SetMetricSamplingPercentagePerLevel(percentages, parameters['seed'])
+    if fixed_mask is not None:
+        method.SetMetricFixedMask(sitk.Cast(fixed_mask != 0, sitk.sitkUInt8))
+    method.SetInterpolator(sitk.sitkLinear)
+    method.SetOptimizerAsRegularStepGradientDescent(learningRate=parameters['learning_rate'], minStep=1e-4,
+                                                    numberOfIterations=parameters['iterations'],
+                                                    gradientMagnitudeTolerance=1e-8)
+    method.SetOptimizerScalesFromPhysicalShift()
+    method.SetShrinkFactorsPerLevel([shrink for shrink, _ in levels])
+    method.SetSmoothingSigmasPerLevel([sigma for _, sigma in levels])
+    method.SmoothingSigmasAreSpecifiedInPhysicalUnitsOff()
+    method.SetInitialTransform(initial, inPlace=False)
+    if threads is not None:
+        method.SetNumberOfThreads(threads)
+
+    transform = method.Execute(fixed, moving)
+    # The optimised transform may come back wrapped in a composite transform; keep the rigid one
+    if transform.GetName() == 'CompositeTransform':
+        composite = sitk.CompositeTransform(transform)
+        transform = composite.GetNthTransform(composite.GetNumberOfTransforms() - 1)
+    return sitk.Euler3DTransform(transform), method.GetMetricValue()
+
+def registration_key(fixed_fn, moving_fn, fixed_mask_fn, parameters):
+    # Content hashes of the inputs and the settings, so a transform is reused only for identical inputs
+    digest = hashlib.sha256()
+    for fn in (fixed_fn, moving_fn, fixed_mask_fn):
+        digest.update((file_hash(fn) if fn is not None else '-').encode())
+    digest.update(json.dumps(parameters, sort_keys=True).encode())
+    return digest.hexdigest()
+
+def cached_registration(fixed_fn, moving_fn, transform_fn, fixed_mask_fn=None, parameters=None, threads=None):
+    """
+    Register moving_fn to fixed_fn, reusing the transform saved in transform_fn when the inputs are unchanged.
+
+    The transform is written as an ITK .tfm file with a JSON sidecar holding the cache key and final metric,
+    so reruns and other products (e.g. resampling the label maps) reuse the same alignment.
+
+    Returns:
+    - transform: sitk.Transform
+    """
+    parameters = {**DEFAULT_PARAMETERS, **(parameters or {})}
+    key = registration_key(fixed_fn, moving_fn, fixed_mask_fn, parameters)
+    sidecar = f"{transform_fn}.json"
+    if os.path.exists(transform_fn) and os.path.exists(sidecar):
+        with open(sidecar) as f:
+            if json.load(f).get('key') == key:
+                return sitk.ReadTransform(transform_fn)
+
+    fixed_mask = read_image(fixed_mask_fn) if fixed_mask_fn is not None else None
+    transform, metric = register(read_image(fixed_fn), read_image(moving_fn), fixed_mask, parameters, threads)
+    # Both files are written under per-process temporary names and moved into place, the transform first, so an
+    # interrupted run or two workers racing never leave a truncated .tfm that a matching sidecar marks as valid
+    tmp_transform_fn = f"{transform_fn}.{os.getpid()}.tmp.tfm"
+    sitk.WriteTransform(transform, tmp_transform_fn)
+    os.replace(tmp_transform_fn, transform_fn)
+    with open(f"{sidecar}.{os.getpid()}.tmp", 'w') as f:
+        json.dump({'key': key, 'metric': metric, 'fixed': fixed_fn, 'moving': moving_fn, 'parameters': parameters}, f, indent=1)
+    os.replace(f"{sidecar}.{os.getpid()}.tmp", sidecar)
+    return transform
+
+def resample_to(reference, moving, transform, default_value=0.0):
+    # Moving image on the grid of the reference image, keeping its pixel type
+    return sitk.Resample(moving, reference, transform, sitk.sitkLinear, default_value, moving.GetPixelID())
+
+def main():
+    parser = argparse.ArgumentParser(description="Rigidly register a follow-up crop to its baseline crop.")
+    parser.add_argument('fixed_image', type=str, help='Baseline crop (e.g. *_V1_Femur_Right_cropped.nii.gz)')
+    parser.add_argument('moving_image', type=str, help='Follow-up crop')
+    parser.add_argument('--fixed_mask', type=str, help='Baseline bone mask the metric is sampled in (e.g. *_V1_Femur_Right_cropped_mask.nii.gz)')
+    parser.add_argument('--transform', type=str, help='Transform file (default: next to the moving image, *_to_baseline.tfm)')
+    parser.add_argument('--sampling_percentage', type=float, default=DEFAULT_PARAMETERS['sampling_percentage'], help='Fraction of the mask voxels sampled by the metric')
+    parser.add_argument('--shrink_factors', type=int, nargs='+', default=DEFAULT_PARAMETERS['shrink_factors'], help='Pyramid shrink factors, coarse to fine (e.g. 4 2 1)')
+    parser.add_argument('--smoothing_sigmas', type=float, nargs='+', default=DEFAULT_PARAMETERS['smoothing_sigmas'], help='Pyramid smoothing sigmas in voxels (e.g. 2 1 0)')
+    args = parser.parse_args()
+
+    base_name = os.path.basename(args.moving_image).replace('_cropped.nii.gz', '').replace('.nii.gz', '')
+    output_directory = os.path.dirname(args.moving_image)
+    transform_fn = args.transform or os.path.join(output_directory, f"{base_name}_to_baseline.tfm")
+    parameters = {'sampling_percentage': args.sampling_percentage, 'shrink_factors': args.shrink_factors,
+                  'smoothing_sigmas': args.smoothing_sigmas}
+    transform = cached_registration(args.fixed_image, args.moving_image, transform_fn, args.fixed_mask, parameters)
+
+    output_filename = os.path.join(output_directory, f"{base_name}_Transformed.nii.gz")
+    write_image(resample_to(read_image(args.fixed_image), read_image(args.moving_image), transform), output_filename)
+    print(f"Transform saved to {transform_fn}, transformed image saved to {output_filename}")
+
+if __name__ == "__main__":
+    main()
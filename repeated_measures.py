@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+from scipy.stats import friedmanchisquare, rankdata
+import zlib
+
+from instrumentation import traced
+from concurrency import process_pool
+
+def friedman_statistic(ranks):
+    # Friedman chi-square (without tie correction) from within-subject ranks of shape (..., subjects, visits)
+    n, k = ranks.shape[-2:]
+    rank_sums = ranks.sum(axis=-2)
+    return 12.0 / (n * k * (k + 1)) * (rank_sums ** 2).sum(axis=-1) - 3.0 * n * (k + 1)
+
+def permutation_pvalue(data, n_permutations, rng):
+    """
+    Permutation p-value of the Friedman test, shuffling the visit labels independently within each subject.
+
+    All permutations are drawn and scored at once as a (permutations, subjects, visits) array. The tie
+    correction only depends on each subject's ranks, which a within-subject shuffle preserves, so the
+    uncorrected statistic orders the permutations exactly like the corrected one.
+    """
+    ranks = rankdata(data, axis=1)
+    observed = friedman_statistic(ranks)
+    order = rng.random((n_permutations,) + ranks.shape).argsort(axis=-1)
+    permuted = np.take_along_axis(np.broadcast_to(ranks, order.shape), order, axis=-1)
+    exceed = np.count_nonzero(friedman_statistic(permuted) >= observed - 1e-9)
+    return (exceed + 1) / (n_permutations + 1)
+
+def bootstrap_means(data, n_bootstrap, confidence, rng):
+    # Resample subjects with replacement for every bootstrap replicate at once: (replicates, subjects, visits)
+    index = rng.integers(0, data.shape[0], size=(n_bootstrap, data.shape[0]))
+    means = data[index].mean(axis=1)
+    alpha = (1.0 - confidence) / 2.0
+    return np.percentile(means, [100 * alpha, 100 * (1 - alpha)], axis=0)
+
+def _pairs(matrix, test):
+    # Upper triangle of a visit-by-visit p-value matrix as tidy rows
+    visits = list(matrix.columns)
+    return [{'Test': test, 'Visit A': a, 'Visit B': b, 'P': matrix.loc[a, b]}
+            for i, a in enumerate(visits) for b in visits[i + 1:]]
+
+@traced
+def test_block(key, metric, table, subject, within, n_permutations, n_bootstrap, confidence, seed):
+    # All tests for one combination (e.g. Femur / Injured / Mean); runs in a worker process
+    rng = np.random.default_rng(seed)
+    data = table.to_numpy(dtype=np.float64)
+    n, k = data.shape
+    test = {'Metric': metric, 'N': n, 'Visits': k, 'Chi2': np.nan, 'P': np.nan, 'P Permutation': np.nan}
+    posthoc, bootstrap = [], []
+
+    if n >= 2 and k >= 3:
+        import scikit_posthocs as sp
+        test['Chi2'], test['P'] = friedmanchisquare(*data.T)
+        if n_permutations:
+            test['P Permutation'] = permutation_pvalue(data, n_permutations, rng)
+        posthoc += _pairs(sp.posthoc_nemenyi_friedman(table), 'Nemenyi')
+        long = table.reset_index().melt(id_vars=subject, var_name=within, value_name=metric)
+        posthoc += _pairs(sp.posthoc_dunn(long, val_col=metric, group_col=within, p_adjust='bonferroni'), 'Dunn')
+
+    if n >= 1 and n_bootstrap:
+        low, high = bootstrap_means(data, n_bootstrap, confidence, rng)
+        bootstrap = [{'Visit': visit, 'Mean': mean, 'CI Low': lo, 'CI High': hi}
+                     for visit, mean, lo, hi in zip(table.columns, data.mean(axis=0), low, high)]
+
+    return key, test, posthoc, bootstrap
+
+def repeated_measures_tests(df, groupby=('Bone', 'Leg Condition'), metrics=('Mean', 'Median'), subject='Participant',
+                            within='Visit', n_permutations=10000, n_bootstrap=10000, confidence=0.95, seed=0, max_workers=None):
+    """
+    Run Friedman, Nemenyi and Dunn tests, permutation p-values and bootstrap CIs for every combination in one call.
+
+    Parameters:
+    - df: pandas DataFrame in long format (one row per subject and visit)
+    - groupby: sequence of str, columns defining the combinations (e.g. bone and leg condition)
+    - metrics: sequence of str, value columns tested separately (e.g. 'Mean', 'Median')
+    - subject: str, column identifying the repeated-measures subject
+    - within: str, column holding the repeated factor (visit)
+    - n_permutations: int, number of within-subject permutations (0 to skip)
+    - n_bootstrap: int, number of bootstrap replicates of the per-visit means (0 to skip)
+    - confidence: float, level of the bootstrap confidence intervals
+    - seed: int, seed from which every combination gets an independent random stream (derived from its key)
+    - max_workers: int, number of worker processes (1 runs everything in this process)
+
+    Returns:
+    - tests: pandas DataFrame, one row per combination and metric
+    - posthoc: pandas DataFrame, one row per combination, metric, post-hoc test and visit pair
+    - bootstrap: pandas DataFrame, one row per combination, metric and visit
+    """
+    groupby = list(groupby)
+    blocks = []
+    for key, group in df.groupby(groupby, sort=True):
+        for metric in metrics:
+            # Only subjects measured at every visit enter the repeated-measures tests
+            table = group.pivot(index=subject, columns=within, values=metric).dropna()
+            blocks.append((key, metric, table))
+
+    # Each combination's random stream depends only on its own key, so testing a subset of the
+    # combinations (see longitudinal_update) reproduces the full run exactly
+    seeds = [np.random.SeedSequence([seed, zlib.crc32(repr((key, metric)).encode())]) for key, metric, _ in blocks]
+    arguments = [(key, metric, table, subject, within, n_permutations, n_bootstrap, confidence, s)
+                 for (key, metric, table), s in zip(blocks, seeds)]
+    if max_workers == 1 or len(arguments) <= 1:
+        outputs = [test_block(*a) for a in arguments]
+    else:
+        with process_pool(max_workers, itk=False) as executor:
+            outputs = list(executor.map(test_block, *zip(*arguments)))
+
+    tests, posthoc, bootstrap = [], [], []
+    for key, test, block_posthoc, block_bootstrap in outputs:
+        labels = dict(zip(groupby, key))
+        tests.append({**labels, **test})
+        posthoc += [{**labels, 'Metric': test['Metric'], **row} for row in block_posthoc]
+        bootstrap += [{**labels, 'Metric': test['Metric'], **row} for row in block_bootstrap]
+    return pd.DataFrame(tests), pd.DataFrame(posthoc), pd.DataFrame(bootstrap)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import argparse
+import os
+import uuid
+
+from compartments import WHOLE_BONE
+
+# One schema for every bone and product type; Bone and Visit are the partition keys
+SCHEMA = pa.schema([
+    ('Participant', pa.string()),
+    ('Bone', pa.string()),
+    ('Side', pa.string()),
+    ('Leg Condition', pa.string()),
+    ('Visit', pa.string()),
+    ('Product', pa.string()),
+    ('Compartment', pa.string()),
+    ('Sigma', pa.float64()),
+    ('Threshold', pa.float64()),
+    ('Mean', pa.float64()),
+    ('StdDev', pa.float64()),
+    ('Max', pa.float64()),
+    ('Min', pa.float64()),
+    ('Median', pa.float64()),
+    ('P25', pa.float64()),
+    ('P75', pa.float64()),
+    ('Path', pa.string()),
+    ('Written', pa.timestamp('us', tz='UTC')),
+])
+
+PARTITION_COLUMNS = ['Bone', 'Visit']
+
+# A result is identified by its source image, threshold and compartment; the latest write wins
+KEY_COLUMNS = ['Path', 'Threshold', 'Compartment']
+
+def append_results(df, root):
+    """
+    Append analysis results to the partitioned Parquet store.
+
+    Existing files are never rewritten: every call adds new files under root/Bone=.../Visit=.../,
+    and read_results keeps the most recent row for each source image, threshold and compartment.
+
+    Parameters:
+    - df: pandas DataFrame with the SCHEMA columns (Written is filled in if missing)
+    - root: str, directory of the results store
+    """
+    if df.empty:
+        return
+    df = df.copy()
+    if 'Written' not in df:
+        df['Written'] = pd.Timestamp.now(tz='UTC')
+    if 'Compartment' not in df:
+        df['Compartment'] = WHOLE_BONE
+    table = pa.Table.from_pandas(df[SCHEMA.names], schema=SCHEMA, preserve_index=False)
+    pq.write_to_dataset(table, root, partition_cols=PARTITION_COLUMNS,
+                        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet")
+
+def read_results(root, columns=None, bone=None, visits=None, product=None, participants=None, threshold=None,
+                 compartment=WHOLE_BONE, latest=True):
+    """
+    Read results from the store, touching only the requested partitions and columns.
+
+    Parameters:
+    - root: str, directory of the results store
+    - columns: list of str, columns to load (default: all)
+    - bone: str, only read this bone's partition (e.g. 'Femur')
+    - visits: list of str, only read these visit partitions
+    - product: str, only keep this product type (e.g. 'common', 'difference')
+    - participants: list of str, only keep these participants
+    - threshold: float, only keep results computed with this threshold
+    - compartment: str, only keep this compartment (default: whole bone; e.g. 'Cortical', None for all)
+    - latest: bool, drop superseded rows for the same source image, threshold and compartment
+
+    Returns:
+    - df: pandas DataFrame
+    """
+    if not os.path.exists(root):
+        return pd.DataFrame(columns=columns if columns is not None else SCHEMA.names)
+
+    filters = []
+    if bone is not None:
+        filters.append(('Bone', '=', bone))
+    if visits is not None:
+        filters.append(('Visit', 'in', list(visits)))
+    if product is not None:
+        filters.append(('Product', '=', product))
+    if participants is not None:
+        filters.append(('Participant', 'in', list(participants)))
+    if threshold is not None:
+        filters.append(('Threshold', '=', float(threshold)))
+
+    load_columns = None
+    if columns is not None:
+        # The de-duplication key is needed even if the caller did not ask for it
+        extra = KEY_COLUMNS + ['Written'] if latest else ['Compartment']
+        load_columns = list(dict.fromkeys(list(columns) + extra))
+
+    # Reading with the full schema fills in the columns missing from files written by older versions;
+    # rows written before compartments were stored are whole-bone rows
+    df = pd.read_parquet(root, columns=load_columns, filters=filters or None, schema=SCHEMA)
+    # Partition keys come back as categoricals
+    for column in PARTITION_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype(str)
+    df['Compartment'] = df['Compartment'].fillna(WHOLE_BONE)
+    if compartment is not None:
+        df = df[df['Compartment'] == compartment]
+    if latest and not df.empty:
+        df = df.sort_values('Written').drop_duplicates(KEY_COLUMNS, keep='last').sort_index()
+    if columns is not None:
+        df = df[list(columns)]
+    return df.reset_index(drop=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Show or export the contents of a results store.")
+    parser.add_argument('root', type=str, help='Directory of the results store')
+    parser.add_argument('--bone', type=str, help='Only read this bone (e.g. Femur)')
+    parser.add_argument('--product', type=str, help='Only read this product type (e.g. common)')
+    parser.add_argument('--compartment', type=str, default=WHOLE_BONE, help="Only read this compartment (e.g. Cortical, 'all' for every compartment; default: Whole)")
+    parser.add_argument('--output', type=str, help='Export the selection to CSV')
+    args = parser.parse_args()
+
+    df = read_results(args.root, bone=args.bone, product=args.product,
+                      compartment=None if args.compartment == 'all' else args.compartment)
+    print(df.to_string(index=False))
+    if args.output is not None:
+        df.to_csv(args.output, index=False)
+
+if __name__ == "__main__":
+    main()
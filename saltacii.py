@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import os
+import runpy
+import statistics
+import subprocess
+import sys
+import time
+
+# Subcommand -> script; a script (and whatever heavy modules it imports) is only loaded when its subcommand runs
+COMMANDS = {
+    'extract': 'extract',
+    'extract_crop': 'extract_crop',
+    'treece_crop': 'treece_crop',
+    'profiles': 'cortical_profiles',
+    'register': 'registration',
+    'crop': 'crop',
+    'common_region': 'common_region',
+    'common_region_crop': 'common_region_crop',
+    'crm': 'crm',
+    'compartments': 'compartments',
+    'difference': 'voxel_difference',
+    'checkerboard': 'checkerboard',
+    'stats': 'descriptive_stats',
+    'zonal': 'zonal_stats',
+    'catalog': 'catalog',
+    'results': 'results_store',
+    'participant': 'participant_run',
+    'schedule': 'scheduler',
+    'update': 'longitudinal_update',
+    'spm': 'voxelwise_friedman',
+    'iso_surface': 'iso_surface',
+    'vis3d': 'vis3d',
+    'phantom': 'phantom',
+    'benchmark': 'benchmark',
+    'trace': 'instrumentation',
+}
+
+HEAVY_MODULES = ['SimpleITK', 'numpy', 'scipy', 'pandas', 'pyarrow', 'vtk', 'matplotlib', 'seaborn', 'scikit_posthocs']
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Runs an entry point up to its argument parsing (--help exits there) and reports which heavy modules it loaded
+_PROBE = """
+import runpy, sys
+sys.path.insert(0, {script_dir!r})
+sys.argv = [{module!r}, '--help']
+try:
+    runpy.run_module({module!r}, run_name='__main__')
+except SystemExit:
+    pass
+print(','.join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+def run_command(command, argv):
+    # Run a subcommand's script in this process, exactly as `python script.py argv...` would
+    module = COMMANDS[command]
+    sys.argv = [os.path.join(SCRIPT_DIR, f"{module}.py")] + list(argv)
+    if SCRIPT_DIR not in sys.path:
+        sys.path.insert(0, SCRIPT_DIR)
+    runpy.run_module(module, run_name='__main__', alter_sys=True)
+
+def measure_startup(commands=None, repeat=5):
+    """
+    Measure the startup time of each entry point in a fresh interpreter.
+
+    Each entry point is run with --help, which covers interpreter start, its imports and argument parsing.
+
+    Parameters:
+    - commands: list of str, subcommands to measure (default: all)
+    - repeat: int, runs per entry point; the median is reported
+
+    Returns:
+    - list of (command, median seconds, heavy modules loaded)
+    """
+    results = []
+    for command in commands or COMMANDS:
+        code = _PROBE.format(script_dir=SCRIPT_DIR, module=COMMANDS[command], heavy=HEAVY_MODULES)
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+            times.append(time.perf_counter() - start)
+        loaded = output.strip().splitlines()[-1] if output.strip() else ''
+        results.append((command, statistics.median(times), loaded))
+    return results
+
+def main():
+    # saltacii.py [--trace trace.json] [--workers N] [--threads N] <command> ...
+    # --trace records a trace of the command and the processes it starts; --workers and --threads set the
+    # global concurrency (worker processes and threads per process, see concurrency.py) for every stage
+    trace_path = None
+    while len(sys.argv) > 2 and sys.argv[1] in ('--trace', '--workers', '--threads'):
+        option, value = sys.argv[1:3]
+        del sys.argv[1:3]
+        if option == '--trace':
+            trace_path = value
+        elif option == '--workers':
+            from concurrency import WORKERS_ENV
+            os.environ[WORKERS_ENV] = str(int(value))
+        else:
+            # Also limits this process, for commands that run their stages in-process
+            from concurrency import THREADS_ENV, set_threads
+            os.environ[THREADS_ENV] = str(int(value))
+            set_threads(int(value))
+    if trace_path is not None:
+        import instrumentation
+        instrumentation.enable(trace_path)
+        if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+            with instrumentation.span(sys.argv[1], 'command'):
+                run_command(sys.argv[1], sys.argv[2:])
+            return
+
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        run_command(sys.argv[1], sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(description="SALTACII CT pipeline. Run 'saltacii.py <command> --help' for the options of a command.")
+    parser.add_argument('command', choices=list(COMMANDS) + ['startup'], help='Pipeline command, or startup to time every entry point')
+    parser.add_argument('--commands', type=str, nargs='+', choices=list(COMMANDS), help='Entry points timed by startup (default: all)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per entry point for startup (default: 5)')
+    args = parser.parse_args()
+
+    if args.command == 'startup':
+        for command, seconds, loaded in measure_startup(args.commands, args.repeat):
+            print(f"{command:<20} {1000 * seconds:8.1f} ms   {loaded}")
+
+if __name__ == "__main__":
+    main()
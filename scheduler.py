@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import SimpleITK as sitk
+import argparse
+import os
+import time
+from concurrent.futures import wait, FIRST_COMPLETED
+
+import image_io
+from concurrency import process_pool, thread_split
+from bone_utils import LABELS_PATH, load_labels
+from participant_run import (find_visits, bone_path, crop_visit, bone_profiles, bone_registration, bone_fov_intersection, bone_common_mask,
+                             bone_common_region, bone_compartments, bone_difference, bone_checkerboard)
+
+STAGES = ['crop', 'cortical_profiles', 'registration', 'common_region', 'crm', 'common_region_crop', 'compartments', 'difference', 'checkerboard',
+          'statistics']
+
+# Resident memory of an idle worker (interpreter, SimpleITK, NumPy), as reported by benchmark.py
+WORKER_BASE_MB = 250
+
+# Peak memory of a task as a multiple of its largest input image, from the intermediate images each
+# stage holds at once (e.g. crop: CT, label map, label mask, dilated mask and masked CT)
+FOOTPRINT_FACTORS = {
+    'crop': 4.0,
+    'cortical_profiles': 4.0,
+    'registration': 6.0,
+    'common_region': 2.0,
+    'crm': 3.0,
+    'common_region_crop': 4.0,
+    'compartments': 4.0,
+    'difference': 6.0,
+    'checkerboard': 5.0,
+    'statistics': 3.0,
+}
+
+class Task:
+    """
+    One node of the task graph.
+
+    memory_mb is a number, or a callable evaluated once the task's dependencies have finished
+    (so the footprint can be read from the headers of the inputs they wrote).
+    """
+    def __init__(self, key, function, args=(), kwargs=None, deps=(), memory_mb=0.0):
+        self.key = key
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.deps = list(deps)
+        self.memory_mb = memory_mb
+
+def image_mb(fn):
+    # Decoded size of an image from its header only; 0 if the file does not exist (yet)
+    if fn is None or not os.path.exists(fn):
+        return 0.0
+    reader = sitk.ImageFileReader()
+    reader.SetFileName(fn)
+    reader.ReadImageInformation()
+    pixel_bytes = sitk.Image([1] * reader.GetDimension(), reader.GetPixelID()).GetSizeOfPixelComponent()
+    voxels = 1
+    for n in reader.GetSize():
+        voxels *= n
+    return voxels * reader.GetNumberOfComponents() * pixel_bytes / (1024 * 1024)
+
+def footprint(stage, *paths):
+    # Estimated peak memory of a task from its largest input
+    return lambda: WORKER_BASE_MB + FOOTPRINT_FACTORS[stage] * max([image_mb(fn) for fn in paths] + [0.0])
+
+def default_memory_budget_mb():
+    # 75% of physical memory
+    return 0.75 * os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / (1024 * 1024)
+
+def _worker_init():
+    # Tasks in a worker are unrelated, so images are not kept between them; the admitted footprint
+    # only holds if a task's memory is released when it finishes
+    image_io._cache = image_io.ImageCache(0)
+
+def _run_task(function, args, kwargs):
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start
+
+def run_graph(tasks, memory_budget_mb=None, max_workers=None):
+    """
+    Run a task graph in worker processes, admitting ready tasks while their estimated memory fits the budget.
+
+    Ready tasks are considered largest first and smaller ones fill the remaining budget, so many small
+    tasks (e.g. patella) run alongside a few large ones (e.g. femur). A task larger than the whole budget
+    runs on its own. When a task fails, the tasks depending on it are skipped.
+
+    Parameters:
+    - tasks: list of Task, dependencies refer to the keys of other tasks in the list
+    - memory_budget_mb: float, total memory admitted at once (default: 75% of physical memory)
+    - max_workers: int, number of worker processes, sharing the cores (default: see concurrency.thread_split)
+
+    Returns:
+    - status: dict, task key -> ('done', seconds), ('failed', error) or ('skipped', failed dependency)
+    """
+    if memory_budget_mb is None:
+        memory_budget_mb = default_memory_budget_mb()
+    max_workers, _ = thread_split(max_workers)
+    by_key = {task.key: task for task in tasks}
+    waiting = {task.key: len(task.deps) for task in tasks}
+    dependents = {task.key: [] for task in tasks}
+    for task in tasks:
+        for dep in task.deps:
+            dependents[dep].append(task.key)
+
+    def estimate(key):
+        memory = by_key[key].memory_mb
+        return float(memory() if callable(memory) else memory)
+
+    ready = {key: estimate(key) for key, count in waiting.items() if count == 0}
+    running = {}
+    status = {}
+    in_use = peak = 0.0
+
+    def skip(key, reason):
+        for dependent in dependents[key]:
+            if dependent not in status:
+                status[dependent] = ('skipped', reason)
+                skip(dependent, reason)
+
+    with process_pool(max_workers, initializer=_worker_init) as executor:
+        while ready or running:
+            for key in sorted(ready, key=lambda k: -ready[k]):
+                if len(running) >= max_workers:
+                    break
+                if in_use + ready[key] <= memory_budget_mb or not running:
+                    task = by_key[key]
+                    future = executor.submit(_run_task, task.function, task.args, task.kwargs)
+                    running[future] = (key, ready.pop(key))
+                    in_use += running[future][1]
+                    peak = max(peak, in_use)
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                key, memory = running.pop(future)
+                in_use -= memory
+                try:
+                    status[key] = ('done', future.result())
+                except Exception as error:
+                    status[key] = ('failed', repr(error))
+                    print(f"Task {key} failed: {error!r}")
+                    skip(key, key)
+                    continue
+                for dependent in dependents[key]:
+                    waiting[dependent] -= 1
+                    if waiting[dependent] == 0 and dependent not in status:
+                        ready[dependent] = estimate(dependent)
+
+    print(f"{sum(s[0] == 'done' for s in status.values())} tasks done, {sum(s[0] == 'failed' for s in status.values())} failed, "
+          f"{sum(s[0] == 'skipped' for s in status.values())} skipped; peak admitted memory {peak:.0f} of {memory_budget_mb:.0f} MB")
+    return status
+
+def bone_statistics(participant_dir, participant, visits, description, results_root, threshold=1500):
+    # Statistics of the *_common images of one bone, appended to the results store; with a compartment
+    # label map (on the baseline, visits[0]) the cortical and trabecular rows come from the same pass
+    from ct_analysis import analyze_ct_images
+    from results_store import append_results
+    paths = [bone_path(participant_dir, participant, visit, description, 'common') for visit in visits]
+    paths = [fn for fn in paths if os.path.exists(fn)]
+    compartments_fn = bone_path(participant_dir, participant, visits[0], description, 'compartments')
+    compartments = {fn: compartments_fn for fn in paths} if os.path.exists(compartments_fn) else None
+    if paths:
+        append_results(analyze_ct_images(paths, threshold=threshold, max_workers=1, compartments=compartments), results_root)
+
+def build_cohort_graph(study_root, participants=None, stages=STAGES, participant_prefix='SALTACII_', labels_csv=LABELS_PATH,
+                       label_map_suffix='labels', baseline='V1', buffer=30, gaussian_sigma=None, slice_number=50,
+                       results_root='results_store', fov_shape='box'):
+    """
+    Build the per-participant, per-bone, per-visit task graph:
+    label crop -> cortical profiles, registration -> common region -> common mask -> common region crop
+    -> difference / checkerboard, and -> compartments -> statistics.
+
+    Returns:
+    - list of Task
+    """
+    labels = load_labels(labels_csv)
+    if participants is None:
+        participants = sorted(name for name in os.listdir(study_root) if name.startswith(participant_prefix))
+
+    tasks = []
+    def add(key, function, args, deps, memory, stage):
+        # Tasks of stages that are not run are left out; dependencies on them are dropped
+        if stage in stages:
+            keys = {task.key for task in tasks}
+            tasks.append(Task(key, function, args, deps=[dep for dep in deps if dep in keys], memory_mb=memory))
+
+    for name in participants:
+        participant_dir = os.path.join(study_root, name)
+        visits = find_visits(participant_dir)
+        if baseline not in visits:
+            print(f"Skipping {name}: no {baseline} calibrated CT")
+            continue
+        participant = visits[baseline][0]
+        ordered = [baseline] + sorted(visit for visit in visits if visit != baseline)
+
+        for visit in ordered:
+            ct_path = visits[visit][1]
+            add(('crop', participant, visit), crop_visit,
+                (participant_dir, participant, visit, ct_path, labels, ('extract_crop', 'treece_crop'), label_map_suffix),
+                [], footprint('crop', ct_path), 'crop')
+
+        for _, description in labels:
+            def path(visit, suffix):
+                return bone_path(participant_dir, participant, visit, description, suffix)
+            for visit in ordered:
+                add(('cortical_profiles', participant, description, visit), bone_profiles,
+                    (participant_dir, participant, visit, description), [('crop', participant, visit)],
+                    footprint('cortical_profiles', path(visit, 'treece_cropped')), 'cortical_profiles')
+            for visit in ordered[1:]:
+                add(('registration', participant, description, visit), bone_registration,
+                    (participant_dir, participant, visit, baseline, description),
+                    [('crop', participant, baseline), ('crop', participant, visit)],
+                    footprint('registration', path(baseline, 'cropped'), path(visit, 'cropped')), 'registration')
+            region_key = ('common_region', participant, description)
+            add(region_key, bone_fov_intersection,
+                (participant_dir, participant, {visit: visits[visit][1] for visit in ordered}, baseline, description, fov_shape),
+                [('crop', participant, baseline)] + [('registration', participant, description, visit) for visit in ordered[1:]],
+                footprint('common_region', path(baseline, 'cropped')), 'common_region')
+            mask_key = ('crm', participant, description)
+            add(mask_key, bone_common_mask, (participant_dir, participant, baseline, description),
+                [('crop', participant, baseline), region_key], footprint('crm', path(baseline, 'cropped_mask')), 'crm')
+            # All visits of a bone share the common mask and its bounding box, so they are resampled in one task
+            common_key = ('common_region_crop', participant, description)
+            add(common_key, bone_common_region, (participant_dir, participant, ordered, baseline, description, buffer),
+                [mask_key] + [('crop', participant, visit) for visit in ordered]
+                + [('registration', participant, description, visit) for visit in ordered[1:]],
+                footprint('common_region_crop', *[path(visit, suffix) for visit in ordered
+                                                  for suffix in ('cropped', 'Transformed', 'cropped_Transformed')]),
+                'common_region_crop')
+            compartments_key = ('compartments', participant, description)
+            add(compartments_key, bone_compartments, (participant_dir, participant, baseline, description), [common_key],
+                footprint('compartments', path(baseline, 'common')), 'compartments')
+            for visit in ordered[1:]:
+                deps = [common_key]
+                add(('difference', participant, description, visit), bone_difference,
+                    (participant_dir, participant, visit, baseline, description, gaussian_sigma),
+                    deps, footprint('difference', path(baseline, 'common'), path(visit, 'common')), 'difference')
+                add(('checkerboard', participant, description, visit), bone_checkerboard,
+                    (participant_dir, participant, visit, baseline, description, (20, 20, 20), slice_number),
+                    deps, footprint('checkerboard', path(baseline, 'common'), path(visit, 'common')), 'checkerboard')
+            add(('statistics', participant, description), bone_statistics,
+                (participant_dir, participant, ordered, description, results_root),
+                [common_key, compartments_key], footprint('statistics', *[path(visit, 'common') for visit in ordered]), 'statistics')
+    return tasks
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the pipeline for a whole cohort under a memory budget.")
+    parser.add_argument('study_root', type=str, help='Directory containing one folder per participant')
+    parser.add_argument('--participants', type=str, nargs='+', help='Participants to run (default: every participant folder)')
+    parser.add_argument('--stages', type=str, nargs='+', choices=STAGES, default=STAGES, help='Stages to run (default: all)')
+    parser.add_argument('--memory_gb', type=float, help='Memory budget of all running tasks (default: 75%% of physical memory)')
+    parser.add_argument('--max_workers', type=int, help='Number of worker processes (default: SALTACII_WORKERS or one per core)')
+    parser.add_argument('--baseline', type=str, default='V1', help='Baseline visit (default: V1)')
+    parser.add_argument('--label_map_suffix', type=str, default='labels', help='Label map of each visit: {participant}_{visit}_{suffix}.nii.gz')
+    parser.add_argument('--gaussian_sigma', type=float, help='Smooth the difference images with this sigma (optional)')
+    parser.add_argument('--slice', type=int, default=50, help='Slice number shown in the checkerboard figures')
+    parser.add_argument('--results_root', type=str, default='results_store', help='Directory of the results store')
+    parser.add_argument('--fov_shape', type=str, choices=['box', 'cylinder'], default='box', help='Field of view of each scan for the common region (default: box)')
+    args = parser.parse_args()
+
+    tasks = build_cohort_graph(args.study_root, args.participants, args.stages, label_map_suffix=args.label_map_suffix,
+                               baseline=args.baseline, gaussian_sigma=args.gaussian_sigma, slice_number=args.slice,
+                               results_root=args.results_root, fov_shape=args.fov_shape)
+    start = time.perf_counter()
+    memory_budget_mb = args.memory_gb * 1024 if args.memory_gb is not None else None
+    status = run_graph(tasks, memory_budget_mb, args.max_workers)
+    for key, (state, detail) in status.items():
+        if state != 'done':
+            print(f"{state:<8} {key}: {detail}")
+    print(f"Cohort run finished in {time.perf_counter() - start:.1f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+import os
+
+# Participant, injured side, age and group; adding a participant is an edit to this table
+STUDY_METADATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'study_metadata.csv')
+
+def load_study_metadata(path=STUDY_METADATA_PATH):
+    return pd.read_csv(path, dtype={'Participant': str, 'Injured Side': str, 'Group': str})
+
+def annotate_leg_condition(df, metadata=None):
+    """
+    Relabel each row's leg as 'Injured' or 'Contralateral' and attach the participant's age and group.
+
+    Works for any results frame with a 'Participant' column and either a 'Side' column or a raw
+    'Leg Condition' such as 'Femur_Left'. Rows of participants missing from the metadata keep
+    their original Leg Condition.
+
+    Parameters:
+    - df: pandas DataFrame of results
+    - metadata: pandas DataFrame from load_study_metadata (default: study_metadata.csv)
+
+    Returns:
+    - df: annotated copy with 'Leg Condition', 'Age' and 'Group'
+    """
+    if metadata is None:
+        metadata = load_study_metadata()
+    side = df['Side'] if 'Side' in df else df['Leg Condition'].str.rsplit('_', n=1).str[-1]
+
+    # One vectorized join for every bone instead of a boolean-mask assignment per participant and side
+    annotated = df.drop(columns=['Age', 'Group'], errors='ignore').merge(
+        metadata[['Participant', 'Injured Side', 'Age', 'Group']], on='Participant', how='left', validate='many_to_one')
+    annotated.index = df.index
+    known = annotated['Injured Side'].notna()
+    annotated['Leg Condition'] = np.where(~known, annotated['Leg Condition'],
+                                          np.where(side == annotated['Injured Side'], 'Injured', 'Contralateral'))
+    return annotated.drop(columns='Injured Side')
+
+def age_summary(metadata=None):
+    # Mean and (population) standard deviation of age per group
+    if metadata is None:
+        metadata = load_study_metadata()
+    return metadata.groupby('Group')['Age'].agg(Mean='mean', StdDev=lambda age: np.std(age))
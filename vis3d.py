@@ -7,23 +7,8 @@ Created on Wed Aug 14 18:49:25 2024
 """
 import vtk
 import argparse
-import os
-
-def create_reader(fn):
-    if fn.endswith('.nii') or fn.endswith('nii.gz'):
-        reader = vtk.vtkNIFTIImageReader()
-        reader.SetFileName(fn)
-    elif fn.endswith('.dcm'):
-        reader = vtk.vtkDICOMImageReader()
-        reader.SetDirectoryName(os.path.dirname(fn))
-    elif fn.endswith('.obj'):
-        reader = vtk.vtkOBJReader()
-        reader.SetFileName(fn)
-    else:
-        raise ValueError(f"Invalid image filename given (only *.dcm, *.nii, and *.obj supported): {fn}")
-    
-    reader.Update()
-    return reader
+
+from image_io import create_reader
 
 def main():
     parser = argparse.ArgumentParser(description='Volume Rendering with VTK.')
@@ -33,12 +18,14 @@ def main():
                         help='Elevation angle for the camera (default: 0)')
     parser.add_argument('--azimuth', type=float, default=0,
                         help='Azimuth angle for the camera (default: 0)')
+    parser.add_argument('--mesh', action='store_true',
+                        help='Render cached iso-surface meshes instead of ray-casting the full volume')
+    parser.add_argument('--threshold', type=float, default=200,
+                        help='Absolute BMD change for the iso-surface meshes (default: 200)')
     args = parser.parse_args()
 
-    difference = create_reader(args.difference_path)
     elevation = args.elevation
     azimuth = args.azimuth
-    ibounds = difference.GetOutput().GetBounds()
 
     scalar_opacity = vtk.vtkPiecewiseFunction()
     scalar_opacity.AddPoint(-1000, 1.0)
@@ -53,9 +40,6 @@ def main():
     color_transfer_function.GetTable(-1000, 1000, 1)
     color_transfer_function.SetNanColor(1.0, 1.0, 1.0)
 
-    mapper = vtk.vtkFixedPointVolumeRayCastMapper()
-    mapper.SetInputData(difference.GetOutput())
-
     color_bar_mapper = vtk.vtkPolyDataMapper()
     color_bar_mapper.SetLookupTable(color_transfer_function)
 
@@ -63,9 +47,40 @@ def main():
     volumeProperty.SetScalarOpacity(scalar_opacity)
     volumeProperty.SetColor(color_transfer_function)
 
-    actor = vtk.vtkVolume()
-    actor.SetMapper(mapper)
-    actor.SetProperty(volumeProperty)
+    if args.mesh:
+        # Load the small cached meshes (built on the first run) instead of the full volume
+        from iso_surface import cached_iso_surfaces
+        mesh_paths = cached_iso_surfaces(args.difference_path, args.threshold)
+        meshes = [(create_reader(mesh_paths['positive']), args.threshold),
+                  (create_reader(mesh_paths['negative']), -args.threshold)]
+    elif args.difference_path.endswith('.obj'):
+        meshes = [(create_reader(args.difference_path), None)]
+    else:
+        meshes = []
+
+    actors = []
+    for mesh, value in meshes:
+        mesh_mapper = vtk.vtkPolyDataMapper()
+        mesh_mapper.SetInputData(mesh.GetOutput())
+        mesh_mapper.ScalarVisibilityOff()
+        mesh_actor = vtk.vtkActor()
+        mesh_actor.SetMapper(mesh_mapper)
+        if value is not None:
+            mesh_actor.GetProperty().SetColor(color_transfer_function.GetColor(value))
+        actors.append(mesh_actor)
+
+    if meshes:
+        ibounds = meshes[0][0].GetOutput().GetBounds()
+    else:
+        difference = create_reader(args.difference_path)
+        ibounds = difference.GetOutput().GetBounds()
+
+        mapper = vtk.vtkFixedPointVolumeRayCastMapper()
+        mapper.SetInputData(difference.GetOutput())
+
+        actor = vtk.vtkVolume()
+        actor.SetMapper(mapper)
+        actor.SetProperty(volumeProperty)
 
     scalar_bar = vtk.vtkScalarBarActor()
     scalar_bar.SetLookupTable(color_bar_mapper.GetLookupTable())
@@ -80,7 +95,11 @@ def main():
     scalar_bar.UnconstrainedFontSizeOn()
 
     renderer = vtk.vtkRenderer()
-    renderer.AddVolume(actor)
+    if meshes:
+        for mesh_actor in actors:
+            renderer.AddActor(mesh_actor)
+    else:
+        renderer.AddVolume(actor)
     renderer.AddActor2D(scalar_bar)
     renderer.SetBackground(1.0, 1.0, 1.0)
     renderer.GetActiveCamera().SetViewUp(0, 0, -1)
@@ -9,45 +9,50 @@ Created on Wed Aug 14 17:23:36 2024
 import SimpleITK as sitk
 import os
 import argparse
-import numpy as np
-
-# Set up argument parser
-parser = argparse.ArgumentParser(description='Compute and save the voxel difference between two images.')
-parser.add_argument('baseline_path', type=str, help='Path to the baseline image.')
-parser.add_argument('followup_path', type=str, help='Path to the follow-up image')
-parser.add_argument('baseline_label', type=str, help='Label for the baseline image')
-parser.add_argument('followup_label', type=str, help='Label for the follow-up image')
-parser.add_argument('--gaussian_filter', type=bool, default=False, help='Apply Gaussian filter after voxel subtraction')
-parser.add_argument('--gaussian_sigma', type=float, help='Sigma for the Gaussian filter')
-
-args = parser.parse_args()
-
-# Read the baseline and follow-up images
-baseline = sitk.ReadImage(args.baseline_path) 
-followup = sitk.ReadImage(args.followup_path)
-
-# Threshold the image to remove values over 1500 (e.g., surgical screws)
-screwless_followup = sitk.Threshold(followup, lower=-np.inf, upper=1500, outsideValue=1500)
-
-# Compute the voxel-wise difference
-difference = sitk.Subtract(followup, baseline)
-# Extract the directory and base name from the baseline image path
-
-output_directory = os.path.dirname(args.baseline_path)
-main_image_base_name = os.path.basename(args.baseline_path).replace('_common.nii.gz', '').replace('V1', f"{args.baseline_label}_{args.followup_label}")
-
-if args.gaussian_filter == True:
-    gaussian = sitk.SmoothingRecursiveGaussianImageFilter()
-    gaussian.SetSigma(args.gaussian_sigma)
-    difference_gaussian = gaussian.Execute(difference)
-    # Define the output filename
-    output_filename = os.path.join(output_directory, f"{main_image_base_name}_difference_gaussian_sigma_{args.gaussian_sigma}.nii.gz")
-    # Write the output image
-    sitk.WriteImage(difference_gaussian, output_filename)
-else:
-    # Define the output filename
-    output_filename = os.path.join(output_directory, f"{main_image_base_name}_difference.nii.gz")
+
+import instrumentation  # noqa: F401, traces SimpleITK calls when SALTACII_TRACE is set
+
+def voxel_difference(baseline, followup, gaussian_sigma=None):
+    # Compute the voxel-wise difference, optionally smoothed with a Gaussian filter
+    difference = sitk.Subtract(followup, baseline)
+    if gaussian_sigma is not None:
+        gaussian = sitk.SmoothingRecursiveGaussianImageFilter()
+        gaussian.SetSigma(gaussian_sigma)
+        difference = gaussian.Execute(difference)
+    return difference
+
+def difference_filename(baseline_path, baseline_label, followup_label, gaussian_sigma=None):
+    # Extract the directory and base name from the baseline image path
+    output_directory = os.path.dirname(baseline_path)
+    main_image_base_name = os.path.basename(baseline_path).replace('_common.nii.gz', '').replace('V1', f"{baseline_label}_{followup_label}")
+    if gaussian_sigma is not None:
+        return os.path.join(output_directory, f"{main_image_base_name}_difference_gaussian_sigma_{gaussian_sigma}.nii.gz")
+    return os.path.join(output_directory, f"{main_image_base_name}_difference.nii.gz")
+
+def main():
+    # Set up argument parser
+    parser = argparse.ArgumentParser(description='Compute and save the voxel difference between two images.')
+    parser.add_argument('baseline_path', type=str, help='Path to the baseline image.')
+    parser.add_argument('followup_path', type=str, help='Path to the follow-up image')
+    parser.add_argument('baseline_label', type=str, help='Label for the baseline image')
+    parser.add_argument('followup_label', type=str, help='Label for the follow-up image')
+    parser.add_argument('--gaussian_filter', type=bool, default=False, help='Apply Gaussian filter after voxel subtraction')
+    parser.add_argument('--gaussian_sigma', type=float, help='Sigma for the Gaussian filter')
+
+    args = parser.parse_args()
+
+    # Read the baseline and follow-up images
+    baseline = sitk.ReadImage(args.baseline_path)
+    followup = sitk.ReadImage(args.followup_path)
+
+    gaussian_sigma = args.gaussian_sigma if args.gaussian_filter == True else None
+    difference = voxel_difference(baseline, followup, gaussian_sigma)
+
     # Write the output image
+    output_filename = difference_filename(args.baseline_path, args.baseline_label, args.followup_label, gaussian_sigma)
     sitk.WriteImage(difference, output_filename)
 
-print(f"Voxel difference image saved to {output_filename}")
\ No newline at end of file
+    print(f"Voxel difference image saved to {output_filename}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import SimpleITK as sitk
+import numpy as np
+import pandas as pd
+from scipy.stats import chi2, rankdata
+import argparse
+import os
+import tempfile
+
+from instrumentation import traced
+
+@traced
+def build_stack(manifest, index, reference, work_dir):
+    """
+    Copy the masked voxels of every participant and visit into one memory-mapped (subjects, visits, voxels) array.
+
+    Only one image is held in memory at a time; the stack lives on disk in work_dir.
+    """
+    participants = list(dict.fromkeys(manifest['Participant']))
+    visits = list(dict.fromkeys(manifest['Visit']))
+    duplicated = manifest.duplicated(['Participant', 'Visit'], keep=False)
+    if duplicated.any():
+        pairs = list(dict.fromkeys(zip(manifest.loc[duplicated, 'Participant'], manifest.loc[duplicated, 'Visit'])))
+        raise ValueError(f"Every participant needs exactly one image per visit; duplicated: {pairs}")
+    table = manifest.set_index(['Participant', 'Visit'])['Path']
+
+    missing = [(p, v) for p in participants for v in visits if (p, v) not in table.index]
+    if missing:
+        raise ValueError(f"Every participant needs an image for every visit; missing: {missing}")
+
+    fn = os.path.join(work_dir, 'voxelwise_stack.npy')
+    stack = np.lib.format.open_memmap(fn, mode='w+', dtype=np.float32, shape=(len(participants), len(visits), index.size))
+    for i, participant in enumerate(participants):
+        for j, visit in enumerate(visits):
+            image = sitk.ReadImage(table[(participant, visit)])
+            if image.GetSize() != reference.GetSize():
+                raise ValueError(f"{table[(participant, visit)]} is not in the shared space of the reference image.")
+            stack[i, j] = sitk.GetArrayViewFromImage(image).ravel()[index]
+    stack.flush()
+    return stack, participants, visits
+
+@traced
+def friedman_chunk(block):
+    """
+    Tie-corrected Friedman statistic for a block of voxels.
+
+    Parameters:
+    - block: array (subjects, visits, voxels)
+
+    Returns:
+    - statistic: array (voxels,)
+    """
+    n, k, _ = block.shape
+    # Rank across visits within each subject and voxel, ties get their average rank
+    ranks = rankdata(block, axis=1)
+    rank_sums = ranks.sum(axis=0)
+    statistic = 12.0 / (n * k * (k + 1)) * (rank_sums ** 2).sum(axis=0) - 3.0 * n * (k + 1)
+
+    # Tie correction: a tie group of size t contributes t³ - t, i.e. t² - 1 for each of its members
+    tie_sizes = (block[:, :, None, :] == block[:, None, :, :]).sum(axis=2)
+    ties = (tie_sizes.astype(np.float64) ** 2 - 1).sum(axis=(0, 1))
+    correction = 1.0 - ties / (n * k * (k * k - 1))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        statistic = np.where(correction > 0, statistic / correction, 0.0)
+    return statistic
+
+def voxelwise_friedman(manifest, mask=None, chunk_voxels=250000, work_dir=None):
+    """
+    Voxel-wise Friedman test across visits for co-registered images of several participants.
+
+    Parameters:
+    - manifest: pandas DataFrame with Participant, Visit and Path columns (images in one shared space)
+    - mask: sitk.Image, voxels != 0 are tested (default: non-zero voxels of the first image)
+    - chunk_voxels: int, voxels ranked per chunk; bounds the working memory
+    - work_dir: str, directory for the memory-mapped stack (default: a temporary directory)
+
+    Returns:
+    - statistic_image, p_value_image: sitk.Image maps in the space of the first image (0 and 1 outside the mask)
+    """
+    reference = sitk.ReadImage(manifest['Path'].iloc[0])
+    if mask is None:
+        mask = reference != 0
+    index = np.flatnonzero(sitk.GetArrayViewFromImage(mask))
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp_dir:
+        stack, participants, visits = build_stack(manifest, index, reference, tmp_dir)
+        n, k = len(participants), len(visits)
+
+        statistic = np.empty(index.size, dtype=np.float64)
+        for start in range(0, index.size, chunk_voxels):
+            stop = min(start + chunk_voxels, index.size)
+            statistic[start:stop] = friedman_chunk(np.asarray(stack[:, :, start:stop]))
+        del stack
+
+    p_value = chi2.sf(statistic, k - 1)
+
+    # Scatter the tested voxels back into full-size maps
+    shape = sitk.GetArrayViewFromImage(reference).shape
+    statistic_map = np.zeros(int(np.prod(shape)), dtype=np.float32)
+    p_value_map = np.ones(int(np.prod(shape)), dtype=np.float32)
+    statistic_map[index] = statistic
+    p_value_map[index] = p_value
+
+    statistic_image = sitk.GetImageFromArray(statistic_map.reshape(shape))
+    statistic_image.CopyInformation(reference)
+    p_value_image = sitk.GetImageFromArray(p_value_map.reshape(shape))
+    p_value_image.CopyInformation(reference)
+    print(f"Tested {index.size} voxels across {n} participants and {k} visits")
+    return statistic_image, p_value_image
+
+def main():
+    parser = argparse.ArgumentParser(description="Voxel-wise Friedman test across visits (statistical parametric map).")
+    parser.add_argument('manifest_path', type=str, help='CSV with Participant, Visit and Path columns of co-registered images')
+    parser.add_argument('output_prefix', type=str, help='Prefix of the output maps (_friedman_statistic.nii.gz, _friedman_p.nii.gz)')
+    parser.add_argument('--mask', type=str, help='Mask of the voxels to test (default: non-zero voxels of the first image)')
+    parser.add_argument('--chunk_voxels', type=int, default=250000, help='Voxels ranked per chunk (default: 250000)')
+    parser.add_argument('--work_dir', type=str, help='Directory for the memory-mapped stack (default: system temp)')
+    args = parser.parse_args()
+
+    manifest = pd.read_csv(args.manifest_path, dtype=str)
+    mask = sitk.ReadImage(args.mask) if args.mask is not None else None
+    statistic_image, p_value_image = voxelwise_friedman(manifest, mask, args.chunk_voxels, args.work_dir)
+
+    sitk.WriteImage(statistic_image, f"{args.output_prefix}_friedman_statistic.nii.gz")
+    sitk.WriteImage(p_value_image, f"{args.output_prefix}_friedman_p.nii.gz")
+    print(f"Statistic and p-value maps saved to {args.output_prefix}_friedman_*.nii.gz")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import SimpleITK as sitk
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+from image_io import read_image, array_to_image
+from descriptive_stats import as_array, voxel_volume_cm3
+from instrumentation import traced
+
+@traced
+def zonal_statistics(zones, image, names=None, voxel_volume=None):
+    """
+    Compute density statistics for every zone of an integer zone map in one pass.
+
+    Parameters:
+    - zones: sitk.Image or integer array, zone label per voxel (0 = outside every zone)
+    - image: sitk.Image or array with the same size, e.g. a *_common.nii.gz BMD image
+    - names: dict mapping zone label to a name (optional)
+    - voxel_volume: float, voxel volume in cm³ used for the BMC (default: taken from the image spacing)
+
+    Returns:
+    - df: pandas DataFrame with one row per non-empty zone (Zone, Name, Count, Sum, Mean, StdDev, BMC)
+    """
+    if voxel_volume is None and isinstance(image, sitk.Image):
+        voxel_volume = voxel_volume_cm3(image)
+
+    labels = as_array(zones).ravel()
+    values = as_array(image).ravel().astype(np.float64)
+    if labels.shape != values.shape:
+        raise ValueError("Zone map and image must have the same size.")
+    if labels.min() < 0:
+        raise ValueError("Zone labels must be non-negative integers.")
+    labels = labels.astype(np.intp, copy=False)
+
+    # Label-indexed reductions: every zone's count and sum from one bincount each, then the squared deviations
+    # from the zone means in a second pass (the sum of squares minus the squared sum cancels at BMD magnitudes)
+    count = np.bincount(labels)
+    total = np.bincount(labels, weights=values, minlength=count.size)
+    mean = total / np.maximum(count, 1)
+    deviation_sq = np.bincount(labels, weights=(values - mean[labels]) ** 2, minlength=count.size)
+
+    # Zone 0 is background; empty labels are dropped
+    zone = np.flatnonzero(count)
+    zone = zone[zone > 0]
+    count, total, mean = count[zone], total[zone], mean[zone]
+    std = np.sqrt(deviation_sq[zone] / count)
+
+    df = pd.DataFrame({
+        'Zone': zone,
+        'Name': [names.get(z, str(z)) if names else str(z) for z in zone],
+        'Count': count,
+        'Sum': total,
+        'Mean': mean,
+        'StdDev': std,
+    })
+    if voxel_volume is not None:
+        df['BMC'] = total * voxel_volume
+    return df
+
+def axial_slab_zones(mask, fractions=(0.2, 0.3, 0.5), axis=0):
+    """
+    Split a bone mask into consecutive slabs along one image axis (e.g. epiphysis, metaphysis, diaphysis).
+
+    Parameters:
+    - mask: sitk.Image or array, bone mask (voxels != 0)
+    - fractions: sequence of float, relative length of each slab from the low end of the mask extent
+    - axis: int, NumPy axis (0 = z, 1 = y, 2 = x) along which the slabs are cut
+
+    Returns:
+    - zones: uint8 array (or sitk.Image if a sitk.Image was given) labelled 1..len(fractions)
+    """
+    mask_array = as_array(mask) != 0
+    occupied = np.flatnonzero(mask_array.any(axis=tuple(a for a in range(mask_array.ndim) if a != axis)))
+    if occupied.size == 0:
+        raise ValueError("Bone mask is empty; it cannot be split into slabs.")
+    start, stop = occupied[0], occupied[-1] + 1
+
+    # Slice index -> slab label, then broadcast along the other axes
+    edges = start + np.round(np.cumsum(fractions) / np.sum(fractions) * (stop - start)).astype(int)
+    slice_labels = np.zeros(mask_array.shape[axis], dtype=np.uint8)
+    slice_labels[start:stop] = np.searchsorted(edges, np.arange(start, stop), side='right') + 1
+    shape = [1] * mask_array.ndim
+    shape[axis] = -1
+    zones = np.where(mask_array, slice_labels.reshape(shape), 0).astype(np.uint8)
+
+    if isinstance(mask, sitk.Image):
+        return array_to_image(zones, reference=mask)
+    return zones
+
+def main():
+    parser = argparse.ArgumentParser(description="Density statistics for every zone of a zone map in one pass.")
+    parser.add_argument('zone_path', type=str, help='Path to the integer zone map, or to a bone mask when --slabs is given')
+    parser.add_argument('image_paths', type=str, nargs='+', help='Paths to the images to summarise (e.g. *_common.nii.gz)')
+    parser.add_argument('--slabs', type=float, nargs='+', help='Cut the mask into slabs of these relative lengths along --axis (e.g. 0.2 0.3 0.5)')
+    parser.add_argument('--slab_names', type=str, nargs='+', default=['Epiphysis', 'Metaphysis', 'Diaphysis'], help='Names of the slabs')
+    parser.add_argument('--axis', type=int, default=0, help='NumPy axis of the bone (0 = z, default: 0)')
+    parser.add_argument('--output', type=str, help='Path to save the statistics as CSV')
+    args = parser.parse_args()
+
+    zones = read_image(args.zone_path)
+    names = None
+    if args.slabs is not None:
+        zones = axial_slab_zones(zones, args.slabs, args.axis)
+        names = dict(enumerate(args.slab_names, start=1))
+
+    results = []
+    for fn in args.image_paths:
+        df = zonal_statistics(zones, read_image(fn), names=names)
+        df.insert(0, 'Image', os.path.basename(fn).replace('.nii.gz', ''))
+        results.append(df)
+    df = pd.concat(results, ignore_index=True)
+    print(df.to_string(index=False))
+
+    if args.output is not None:
+        df.to_csv(args.output, index=False)
+        print(f"Zonal statistics saved to {args.output}")
+
+if __name__ == "__main__":
+    main()